@@ -0,0 +1,250 @@
+"""
+Headless batch checker.
+
+    python batch_cli.py SUBMISSIONS_DIR -o REPORTS_DIR [-j WORKERS] [--style PROFILE]
+
+Writes <name>.json and <name>.pdf per manuscript plus summary.csv into
+REPORTS_DIR. Finished files are recorded in progress.jsonl, so re-running
+the same command after a crash only processes what is left.
+
+Manuscripts for several journals can be checked in one run with
+--style-map, a JSON object mapping glob patterns of relative paths to
+style profiles ({"ijx/*": "ijx", "*": "qaj"}); the first match wins.
+
+With --corpus (or QAJ_CORPUS), every checked manuscript's references are
+also added to the cross-submission corpus (see citation_corpus.py).
+"""
+import argparse
+import csv
+import fnmatch
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from citation_corpus import CitationCorpus, file_digest
+from profiling import recording
+from report_sections import FORMATTING_SECTIONS, formatting_results
+from style_profile import ProfileError, load_profile
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+PROGRESS_FILE = "progress.jsonl"
+SUMMARY_FILE = "summary.csv"
+
+def find_manuscripts(root, recursive=True):
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS) and not name.startswith("~$"):
+                paths.append(os.path.join(dirpath, name))
+        if not recursive:
+            break
+    return paths
+
+def report_stem(root, path):
+    return os.path.relpath(path, root).replace(os.sep, "__")
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+def load_progress(out_dir):
+    """Latest progress record per manuscript, keyed by relative path."""
+    progress = {}
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    if not os.path.exists(path):
+        return progress
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            progress[record["file"]] = record
+    return progress
+
+def append_progress(out_dir, record):
+    with open(os.path.join(out_dir, PROGRESS_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def style_for(rel, style=None, style_map=None):
+    """Style profile name for a manuscript (None: the default profile)."""
+    for pattern, name in (style_map or {}).items():
+        if fnmatch.fnmatch(rel.replace(os.sep, "/"), pattern):
+            return name
+    return style
+
+def process_manuscript(path, root, out_dir, write_pdf=True, allocations=False, profile=False, style=None):
+    """Analyze one manuscript and write its reports. Never raises."""
+    from pipeline import analyze_file
+    rel = os.path.relpath(path, root)
+    record = {"file": rel, **file_signature(path)}
+    started = time.perf_counter()
+    try:
+        stem = os.path.join(out_dir, report_stem(root, path))
+        # Loaded profiles are cached, so each worker compiles a profile once
+        style_profile = load_profile(style)
+        record["style"] = style_profile.id
+        record["style_key"] = style_profile.key
+        with recording(allocations, profile) as recorder:
+            entry = analyze_file(path, profile=style_profile)
+            ref_report = entry["ref_report"]
+            fmt_results = formatting_results(entry)
+            if write_pdf:
+                from citation_formatter import correct_references
+                from report_generator import generate_pdf_report
+                corrected = correct_references(ref_report.get("Extracted References", []))
+                generate_pdf_report(ref_report, corrected, "", fmt_results, output=stem + ".pdf")
+
+        with open(stem + ".json", "w", encoding="utf-8") as f:
+            json.dump({
+                "file": rel,
+                "sha256": file_digest(path),
+                "checked": time.time(),
+                "style": style_profile.name,
+                "author": entry["author"],
+                "references": ref_report,
+                "formatting": fmt_results,
+                "timings": recorder.as_dict(),
+            }, f, indent=2, ensure_ascii=False, default=str)
+
+        record["status"] = "ok"
+        record["total_references"] = ref_report.get("Total References", 0)
+        record["issues"] = {title: len(issues) for title, issues in fmt_results.items()}
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+def write_summary(out_dir, progress):
+    titles = [title for title, _ in FORMATTING_SECTIONS]
+    with open(os.path.join(out_dir, SUMMARY_FILE), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "status", "style", "seconds", "total_references"] + titles + ["error"])
+        for rel in sorted(progress):
+            record = progress[rel]
+            issues = record.get("issues", {})
+            writer.writerow(
+                [rel, record["status"], record.get("style", ""), record.get("seconds", ""),
+                 record.get("total_references", "")]
+                + [issues.get(title, "") for title in titles]
+                + [record.get("error", "")]
+            )
+
+def is_done(record, path, retry_failed, style_key=None):
+    if record is None:
+        return False
+    signature = file_signature(path)
+    if record.get("size") != signature["size"] or record.get("mtime") != signature["mtime"]:
+        return False
+    # Checked against another (or since edited) style profile
+    if style_key is not None and record.get("style_key", style_key) != style_key:
+        return False
+    return record["status"] == "ok" or not retry_failed
+
+def run_batch(root, out_dir, workers=None, write_pdf=True, recursive=True, retry_failed=False,
+              allocations=False, profile=False, style=None, style_map=None, corpus=None):
+    os.makedirs(out_dir, exist_ok=True)
+    corpus = CitationCorpus(corpus) if corpus else None
+    progress = load_progress(out_dir)
+    styles = {}
+    for path in find_manuscripts(root, recursive):
+        rel = os.path.relpath(path, root)
+        styles[path] = style_for(rel, style, style_map)
+    pending = [
+        path for path, name in styles.items()
+        if not is_done(progress.get(os.path.relpath(path, root)), path, retry_failed, load_profile(name).key)
+    ]
+    print(f"{len(pending)} manuscript(s) to check, {len(progress)} already recorded.", file=sys.stderr)
+    if pending:
+        # Analysis modules are imported on first use; load them here once so
+        # forked workers inherit them instead of each importing their own
+        from pipeline import warm_up
+        warm_up({styles[path] for path in pending})
+        if write_pdf:
+            import report_generator  # noqa: F401
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_manuscript, path, root, out_dir, write_pdf, allocations, profile, styles[path]): path
+            for path in pending
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:  # worker process died (e.g. a crash in a C extension)
+                record = {
+                    "file": os.path.relpath(path, root),
+                    **file_signature(path),
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            if corpus and record["status"] == "ok":
+                # Written here, not in the workers, so the corpus has one writer
+                corpus.add_report(os.path.join(out_dir, report_stem(root, path)) + ".json")
+            append_progress(out_dir, record)
+            progress[record["file"]] = record
+            print(f"[{done}/{len(pending)}] {record['status']:6} {record.get('seconds', '-')}s {record['file']}",
+                  file=sys.stderr)
+
+    write_summary(out_dir, progress)
+    return progress
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a directory of PDF/DOCX submissions.")
+    parser.add_argument("input_dir", help="directory containing manuscripts")
+    parser.add_argument("-o", "--output-dir", default="reports", help="where reports are written")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--no-pdf", action="store_true", help="skip PDF report generation")
+    parser.add_argument("--no-recursive", action="store_true", help="do not descend into subdirectories")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-run manuscripts that failed in a previous run")
+    parser.add_argument("--trace-allocations", action="store_true",
+                        help="record net allocations per stage (tracemalloc; slower)")
+    parser.add_argument("--profile", action="store_true",
+                        help="store a cProfile summary in each JSON report")
+    parser.add_argument("--style", default=None,
+                        help="journal style profile name or file (default: QAJ_STYLE_PROFILE or qaj)")
+    parser.add_argument("--style-map", default=None,
+                        help="JSON file mapping glob patterns of relative paths to style profiles")
+    parser.add_argument("--corpus", default=os.environ.get("QAJ_CORPUS"),
+                        help="also add references to this cross-submission corpus (default: QAJ_CORPUS)")
+    args = parser.parse_args(argv)
+
+    style_map = None
+    try:
+        if args.style_map:
+            with open(args.style_map, encoding="utf-8") as f:
+                style_map = json.load(f)
+        for name in [args.style] + list((style_map or {}).values()):
+            load_profile(name)  # fail before starting workers
+    except (OSError, ProfileError, json.JSONDecodeError) as e:
+        parser.error(str(e))
+
+    progress = run_batch(
+        args.input_dir,
+        args.output_dir,
+        workers=args.workers,
+        write_pdf=not args.no_pdf,
+        recursive=not args.no_recursive,
+        retry_failed=args.retry_failed,
+        allocations=args.trace_allocations,
+        profile=args.profile,
+        style=args.style,
+        style_map=style_map,
+        corpus=args.corpus,
+    )
+    failed = sum(1 for record in progress.values() if record["status"] != "ok")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
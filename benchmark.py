@@ -0,0 +1,325 @@
+"""
+Benchmark every pipeline stage on synthetic manuscripts.
+
+    python benchmark.py                       # small + medium, results to bench_results.json
+    python benchmark.py --sizes large -r 5
+    python benchmark.py --sizes medium --references 1000 --citation-density 1.0
+    python benchmark.py --baseline bench_baseline.json --tolerance 0.25
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --imports              # cold import time of each entry point
+
+Manuscripts are generated offline (python-docx / PyMuPDF) from a fixed
+seed, so runs are comparable across machines and commits. Options such as
+--paragraphs (or --pages), --references, --citation-density and
+--off-style-share override those of every selected size. Each stage is
+timed over several repeats (median wall time) and its peak traced memory
+is recorded from a separate traced run. With --baseline, a stage whose median time or peak memory
+exceeds the baseline by more than --tolerance is reported as a regression
+and the exit status is 1.
+
+--imports instead measures how long each entry point takes to import in a
+fresh interpreter (python -X importtime; for the app this includes its
+first render, without Streamlit's own import) and fails when one exceeds
+its budget in IMPORT_BUDGETS. Heavy dependencies (PyMuPDF, python-docx,
+reportlab, httpx) should only load when first used.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import docx
+import fitz
+from docx.shared import Inches, Pt
+
+from citation_formatter import correct_references
+from file_parser import extract_text_from_docx, extract_text_from_pdf
+from format_checker import analyze_docx, check_headings, check_tables_figures
+from pipeline import formatting_results
+from ref_checker import check_references
+from report_generator import generate_pdf_report
+
+SIZES = {
+    "small": {"paragraphs": 60, "references": 30, "citation_density": 0.5, "range_share": 0.2,
+              "off_style_share": 0.1, "tables": 3, "figures": 3},
+    "medium": {"paragraphs": 400, "references": 150, "citation_density": 0.7, "range_share": 0.2,
+               "off_style_share": 0.2, "tables": 10, "figures": 10},
+    "large": {"paragraphs": 2000, "references": 800, "citation_density": 0.9, "range_share": 0.3,
+              "off_style_share": 0.3, "tables": 40, "figures": 40},
+}
+# Seconds to import each entry point in a fresh interpreter.
+IMPORT_BUDGETS = {"streamlit_app": 0.15, "batch_cli": 0.15, "job_service": 0.1}
+# Imported before timing an entry point; their cost is not ours to cut.
+IMPORT_PRELOAD = {"streamlit_app": "streamlit"}
+PARAGRAPHS_PER_PAGE = 6
+HEADINGS = ["ABSTRACT", "1. INTRODUCTION", "2. LITERATURE REVIEW", "3. METHOD", "4. RESULTS",
+            "5. DISCUSSION", "6. CONCLUSION"]
+WORDS = ("model data learning network analysis system method study review neural graph "
+         "evaluation accuracy dataset feature training performance approach results").split()
+SURNAMES = ["Smith", "Lee", "Khan", "Ali", "Chen", "Garcia", "Müller", "Hassan", "Kim", "Rossi"]
+JOURNALS = ["Qubahan Academic Journal", "Journal of Data Science", "IEEE Access", "Nature Reviews"]
+
+def make_manuscript(paragraphs, references, citation_density, range_share, off_style_share,
+                    tables, figures, seed=0):
+    """
+    Build a manuscript description: a list of (kind, text, off_style)
+    blocks where kind is "heading", "body", "bullet", "caption",
+    "references_heading" or "reference".
+    """
+    rng = random.Random(seed)
+    blocks = [("body", "A Synthetic Study of Manuscript Checking at Scale", False),
+              ("body", "Jane Doe, John Roe", False),
+              ("body", "Department of Computing", False)]
+    per_heading = max(1, paragraphs // len(HEADINGS))
+    captions = [f"Table {i + 1}. Synthetic results" for i in range(tables)] + \
+               [f"Figure {i + 1}: Synthetic plot" for i in range(figures)]
+    rng.shuffle(captions)
+    for n in range(paragraphs):
+        if n % per_heading == 0 and n // per_heading < len(HEADINGS):
+            blocks.append(("heading", HEADINGS[n // per_heading], False))
+        words = [rng.choice(WORDS) for _ in range(rng.randint(40, 90))]
+        if rng.random() < citation_density:
+            first = rng.randint(1, references)
+            if rng.random() < range_share:
+                cite = f"[{first}–{min(references, first + rng.randint(1, 8))}]"
+            else:
+                cite = "[" + ", ".join(str(rng.randint(1, references)) for _ in range(rng.randint(1, 3))) + "]"
+            words.insert(rng.randint(0, len(words)), cite)
+        if captions and rng.random() < 0.1:
+            label = captions[-1].split(".")[0].split(":")[0]
+            words.insert(rng.randint(0, len(words)), f"(see {label})")
+        kind = "bullet" if rng.random() < 0.05 else "body"
+        blocks.append((kind, " ".join(words).capitalize() + ".", rng.random() < off_style_share))
+        if captions and rng.random() < 0.05:
+            blocks.append(("caption", captions.pop(), False))
+    blocks.extend(("caption", caption, False) for caption in captions)
+
+    blocks.append(("references_heading", "References", False))
+    for i in range(references):
+        authors = ", ".join(f"{rng.choice(SURNAMES)}, {chr(65 + rng.randint(0, 25))}." for _ in range(rng.randint(1, 4)))
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize()
+        year = rng.randint(1995, 2024)
+        year_text = f"**({year})**" if rng.random() < 0.5 else f"({year})"
+        doi = f" https://doi.org/10.{rng.randint(1000, 99999)}/syn.{i}" if rng.random() < 0.6 else ""
+        text = f"{authors} {year_text}. {title}. {rng.choice(JOURNALS)}, {rng.randint(1, 40)}({rng.randint(1, 12)}), {rng.randint(1, 300)}-{rng.randint(301, 600)}.{doi}"
+        if i and rng.random() < 0.02:
+            text = text.replace(",", " ,", 1)  # a near-duplicate-ish variant
+        blocks.append(("reference", text, rng.random() < off_style_share))
+    return blocks
+
+def write_docx(blocks, path):
+    document = docx.Document()
+    for kind, text, off_style in blocks:
+        style = "List Bullet" if kind == "bullet" else None
+        para = document.add_paragraph(text, style=style)
+        run = para.runs[0]
+        run.font.name = "Times New Roman" if off_style else "Palatino Linotype"
+        if kind == "reference":
+            run.font.size = Pt(8)
+            para.paragraph_format.left_indent = Inches(0.25)
+        elif kind == "references_heading":
+            run.font.size = Pt(10)
+        elif kind == "heading":
+            run.italic = True
+            para.paragraph_format.space_before = Pt(12)
+        else:
+            run.font.size = Pt(11 if off_style else 12)
+            para.paragraph_format.first_line_indent = Inches(0.2)
+        para.alignment = 3
+    document.save(path)
+
+def write_pdf(blocks, path):
+    document = fitz.open()
+    page_blocks = []
+    body = 0
+    for block in blocks:
+        page_blocks.append(block[1])
+        body += block[0] == "body"
+        if body >= PARAGRAPHS_PER_PAGE:
+            document.new_page().insert_textbox(fitz.Rect(72, 72, 540, 720), "\n".join(page_blocks), fontsize=6)
+            page_blocks, body = [], 0
+    if page_blocks:
+        document.new_page().insert_textbox(fitz.Rect(72, 72, 540, 720), "\n".join(page_blocks), fontsize=6)
+    document.save(path)
+    document.close()
+
+def measure(fn, repeats):
+    """
+    Peak traced memory of one run, then the median wall time of repeats
+    untraced runs (tracemalloc would otherwise inflate the timings).
+    """
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, {"seconds": round(statistics.median(times), 5), "peak_kb": round(peak / 1024, 1)}
+
+def run_size(name, params, repeats, workdir):
+    blocks = make_manuscript(**params)
+    docx_path = os.path.join(workdir, f"{name}.docx")
+    pdf_path = os.path.join(workdir, f"{name}.pdf")
+    write_docx(blocks, docx_path)
+    write_pdf(blocks, pdf_path)
+
+    stages = {}
+    text, stages["extract_text_from_docx"] = measure(lambda: extract_text_from_docx(docx_path), repeats)
+    _, stages["extract_text_from_pdf"] = measure(lambda: extract_text_from_pdf(pdf_path), repeats)
+    docx_results, stages["format_checker.analyze_docx"] = measure(lambda: analyze_docx(docx_path), repeats)
+    headings, stages["check_headings"] = measure(lambda: check_headings(text), repeats)
+    tables, stages["check_tables_figures"] = measure(lambda: check_tables_figures(text), repeats)
+    ref_report, stages["check_references"] = measure(lambda: check_references(text, "Jane Doe"), repeats)
+    refs = ref_report.get("Extracted References", [])
+    corrected, stages["correct_references"] = measure(lambda: correct_references(refs), repeats)
+    fmt = formatting_results({"docx_results": docx_results, "heading_issues": headings, "table_issues": tables})
+    _, stages["generate_pdf_report"] = measure(
+        lambda: generate_pdf_report(ref_report, corrected, "", fmt, output=os.path.join(workdir, "report.pdf")),
+        repeats,
+    )
+    return {
+        "params": params,
+        "pages": len(fitz.open(pdf_path)),
+        "references_found": len(refs),
+        "stages": stages,
+    }
+
+def import_time(module):
+    """
+    Cumulative import time of module in a new interpreter, and its five
+    slowest direct imports, from python -X importtime.
+    """
+    code = "; ".join(f"import {name}" for name in filter(None, [IMPORT_PRELOAD.get(module), module]))
+    # QAJ_WORKERS=0: importing the app must not start worker processes
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, QAJ_WORKERS="0"),
+        capture_output=True, text=True, check=True,
+    )
+    children = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = len(name) - len(name.lstrip()) - 1
+        name = name.strip()
+        if depth == 0 and name == module:
+            slowest = sorted(children, reverse=True)[:5]
+            return int(cumulative) / 1e6, [(child, round(us / 1e6, 4)) for us, child in slowest]
+        if depth == 0:
+            children = []
+        elif depth == 2:
+            children.append((int(cumulative), name))
+    raise RuntimeError(f"{module} was not imported:\n{process.stderr[-2000:]}")
+
+def run_imports(repeats):
+    results = {}
+    for module, budget in IMPORT_BUDGETS.items():
+        runs = [import_time(module) for _ in range(repeats)]
+        results[module] = {
+            "seconds": round(statistics.median(seconds for seconds, _ in runs), 4),
+            "budget": budget,
+            "slowest": runs[-1][1],
+        }
+    return results
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, result in results.items():
+        for stage, now in result["stages"].items():
+            base = baseline.get("results", {}).get(size, {})
+            before = base.get("stages", {}).get(stage)
+            # Overridden sizes are a different manuscript than the baseline's
+            if not before or base.get("params") != result["params"]:
+                continue
+            for metric in ("seconds", "peak_kb"):
+                if before[metric] and now[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(f"{size}/{stage}: {metric} {before[metric]} -> {now[metric]}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the checking pipeline on synthetic manuscripts.")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("-r", "--repeats", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, help="body paragraphs (overrides the sizes')")
+    parser.add_argument("--pages", type=int, help=f"same as --paragraphs pages*{PARAGRAPHS_PER_PAGE}")
+    parser.add_argument("--references", type=int)
+    parser.add_argument("--citation-density", type=float, help="share of paragraphs citing (0-1)")
+    parser.add_argument("--range-share", type=float, help="share of citations that are ranges like [3–7]")
+    parser.add_argument("--off-style-share", type=float, help="share of paragraphs in the wrong font/size")
+    parser.add_argument("--tables", type=int)
+    parser.add_argument("--figures", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against a stored results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    parser.add_argument("--imports", action="store_true", help="measure entry point import times instead")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        imports = run_imports(args.repeats)
+        over = []
+        for module, m in imports.items():
+            print(f"{module:16} {m['seconds']:>8.4f} s (budget {m['budget']} s)")
+            for child, seconds in m["slowest"]:
+                print(f"    {child:28} {seconds:>8.4f} s")
+            if m["seconds"] > m["budget"]:
+                over.append(f"{module}: {m['seconds']} s > {m['budget']} s")
+        if over:
+            print("\nOver budget:", *over, sep="\n  ")
+            return 1
+        return 0
+
+    overrides = {name: getattr(args, name) for name in
+                 ("paragraphs", "references", "citation_density", "range_share", "off_style_share",
+                  "tables", "figures", "seed") if getattr(args, name) is not None}
+    if args.pages is not None:
+        overrides["paragraphs"] = args.pages * PARAGRAPHS_PER_PAGE
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.sizes.split(","):
+            print(f"benchmarking {name}...", file=sys.stderr)
+            results[name] = run_size(name, dict(SIZES[name], **overrides), args.repeats, workdir)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": args.repeats,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        print(f"\n{name} ({result['pages']} pages, {result['references_found']} references)")
+        for stage, m in result["stages"].items():
+            print(f"  {stage:32} {m['seconds']:>10.4f} s {m['peak_kb']:>12.1f} KB")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:", *regressions, sep="\n  ")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
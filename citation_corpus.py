@@ -0,0 +1,414 @@
+"""
+Journal-wide reference corpus: every checked manuscript's normalized
+references and cited authors, in one SQLite file, for questions that span
+submissions (citation stacking, recurring references, copied reference
+lists) without re-reading any manuscript.
+
+    python citation_corpus.py citing "10.1234/abcd"          # or a title / reference
+    python citation_corpus.py top-authors --since 2026-07 --until 2026-09
+    python citation_corpus.py reused-blocks
+    python citation_corpus.py import REPORTS_DIR             # backfill from batch_cli reports
+
+The corpus is QAJ_CORPUS (or --corpus); batch_cli and the app's workers add
+each manuscript as it is checked. Re-checking the same file (same SHA-256)
+replaces its earlier entry, and so does a new revision of a manuscript the
+app checked before (same revision key, see submission_key).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from doi_index import LOOKUP_BATCH, normalize_title
+from reference import as_references
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    digest TEXT UNIQUE NOT NULL,
+    name TEXT,
+    author TEXT,
+    style TEXT,
+    checked REAL NOT NULL,
+    month TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    doi TEXT,
+    title TEXT,
+    year INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_doi ON refs(doi);
+CREATE TABLE IF NOT EXISTS citations (
+    submission INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    ref INTEGER NOT NULL,
+    PRIMARY KEY (submission, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citations_ref ON citations(ref, submission);
+CREATE TABLE IF NOT EXISTS citation_authors (
+    submission INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    PRIMARY KEY (submission, position, author)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citation_authors_author ON citation_authors(author, submission);
+CREATE TABLE IF NOT EXISTS author_months (
+    month TEXT NOT NULL,
+    author TEXT NOT NULL,
+    citations INTEGER NOT NULL,
+    submissions INTEGER NOT NULL,
+    PRIMARY KEY (month, author)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blocks (
+    hash TEXT NOT NULL,
+    submission INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (hash, submission, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blocks_submission ON blocks(submission, position);
+CREATE TABLE IF NOT EXISTS block_counts (
+    hash TEXT PRIMARY KEY,
+    submissions INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS block_counts_submissions ON block_counts(submissions);
+"""
+
+# Corpora written before authors were stored per citation kept them per
+# shared reference; copy them onto each citation once, then drop the table.
+MIGRATE_REF_AUTHORS = """
+INSERT OR IGNORE INTO citation_authors (submission, position, author)
+    SELECT c.submission, c.position, a.author FROM citations c JOIN ref_authors a ON a.ref = c.ref;
+DROP TABLE ref_authors;
+"""
+
+# Consecutive references hashed together to find reused reference blocks.
+BLOCK_SIZE = 3
+
+def reference_key(ref):
+    """What makes two references the same work: DOI, else title, else text."""
+    if ref.doi:
+        return "doi:" + ref.doi
+    if ref.title:
+        return "title:" + normalize_title(ref.title)
+    return "text:" + ref.normalized
+
+def submission_key(digest, revision_key=None):
+    """
+    What identifies a submission: the app's revision key when it has one,
+    so all revisions of a manuscript are one submission, else its SHA-256.
+    """
+    return f"revision:{revision_key}" if revision_key else digest
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def month_of(timestamp):
+    return time.strftime("%Y-%m", time.localtime(timestamp))
+
+def quarter(timestamp=None):
+    """("YYYY-MM", "YYYY-MM"): first and last month of the quarter of timestamp (default: now)."""
+    now = time.localtime(timestamp)
+    first = (now.tm_mon - 1) // 3 * 3 + 1
+    return f"{now.tm_year}-{first:02d}", f"{now.tm_year}-{first + 2:02d}"
+
+def _block_hash(ref_ids):
+    return hashlib.blake2b(",".join(map(str, ref_ids)).encode(), digest_size=12).hexdigest()
+
+def _ranges(positions):
+    """Merge sorted block start positions into (first, last) reference numbers (1-based)."""
+    ranges = []
+    for position in positions:
+        if ranges and position <= ranges[-1][1]:
+            ranges[-1][1] = position + BLOCK_SIZE
+        else:
+            ranges.append([position + 1, position + BLOCK_SIZE])
+    return [tuple(r) for r in ranges]
+
+class CitationCorpus:
+    """
+    The corpus file; safe to share between threads, and to write from
+    several processes (each submission is added in one transaction).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ref_authors'").fetchone():
+                for statement in MIGRATE_REF_AUTHORS.split(";")[:-1]:
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable enough with WAL, far fewer fsyncs
+            self._local.conn = conn
+        return conn
+
+    # --- writing ---------------------------------------------------------
+
+    def _ref_ids(self, conn, refs):
+        keys = [reference_key(ref) for ref in refs]
+        conn.executemany(
+            "INSERT OR IGNORE INTO refs (key, doi, title, year, raw) VALUES (?, ?, ?, ?, ?)",
+            [(key, ref.doi, ref.title, ref.year, ref.raw) for key, ref in zip(keys, refs)],
+        )
+        ids = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), LOOKUP_BATCH):
+            chunk = unique[start:start + LOOKUP_BATCH]
+            ids.update(conn.execute(
+                f"SELECT key, id FROM refs WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return [ids[key] for key in keys]
+
+    def _remove(self, conn, submission, month):
+        authors = conn.execute(
+            "SELECT author, COUNT(*) FROM citation_authors WHERE submission = ? GROUP BY author", (submission,)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE author_months SET citations = citations - ?, submissions = submissions - 1 "
+            "WHERE month = ? AND author = ?",
+            [(count, month, author) for author, count in authors],
+        )
+        conn.execute("DELETE FROM author_months WHERE month = ? AND submissions <= 0", (month,))
+        conn.execute(
+            "UPDATE block_counts SET submissions = submissions - 1 "
+            "WHERE hash IN (SELECT DISTINCT hash FROM blocks WHERE submission = ?)", (submission,)
+        )
+        conn.execute("DELETE FROM block_counts WHERE submissions <= 0")
+        for table in ("citations", "citation_authors", "blocks"):
+            conn.execute(f"DELETE FROM {table} WHERE submission = ?", (submission,))
+        conn.execute("DELETE FROM submissions WHERE id = ?", (submission,))
+
+    def add_submission(self, digest, name, references, author=None, style=None, checked=None):
+        """
+        Record a checked manuscript's reference list (strings or References),
+        replacing the submission stored under the same digest (a SHA-256 or
+        a submission_key).
+        """
+        refs = as_references(references)
+        checked = time.time() if checked is None else checked
+        month = month_of(checked)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = conn.execute("SELECT id, month FROM submissions WHERE digest = ?", (digest,)).fetchone()
+            if previous:
+                self._remove(conn, *previous)
+            submission = conn.execute(
+                "INSERT INTO submissions (digest, name, author, style, checked, month) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, name, author, style, checked, month),
+            ).lastrowid
+            ref_ids = self._ref_ids(conn, refs)
+            conn.executemany(
+                "INSERT INTO citations (submission, position, ref) VALUES (?, ?, ?)",
+                [(submission, position, ref_id) for position, ref_id in enumerate(ref_ids)],
+            )
+
+            conn.executemany(
+                "INSERT OR IGNORE INTO citation_authors (submission, position, author) VALUES (?, ?, ?)",
+                [(submission, position, a) for position, ref in enumerate(refs) for a in ref.authors],
+            )
+            authors = Counter(a for ref in refs for a in set(ref.authors))
+            conn.executemany(
+                "INSERT INTO author_months (month, author, citations, submissions) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (month, author) DO UPDATE SET "
+                "citations = citations + excluded.citations, submissions = submissions + 1",
+                [(month, a, count) for a, count in authors.items()],
+            )
+
+            blocks = [
+                (_block_hash(ref_ids[i:i + BLOCK_SIZE]), submission, i)
+                for i in range(len(ref_ids) - BLOCK_SIZE + 1)
+            ]
+            conn.executemany("INSERT OR IGNORE INTO blocks (hash, submission, position) VALUES (?, ?, ?)", blocks)
+            conn.executemany(
+                "INSERT INTO block_counts (hash, submissions) VALUES (?, 1) "
+                "ON CONFLICT (hash) DO UPDATE SET submissions = submissions + 1",
+                [(h,) for h in {h for h, _, _ in blocks}],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return submission
+
+    def add_report(self, path):
+        """Add a batch_cli JSON report (<name>.json); returns False if it has no SHA-256 or references."""
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        if not report.get("sha256") or not isinstance(report.get("references"), dict):
+            return False
+        self.add_submission(
+            report["sha256"], report["file"], report["references"].get("Extracted References", []),
+            author=report.get("author"), style=report.get("style"), checked=report.get("checked"),
+        )
+        return True
+
+    # --- queries ---------------------------------------------------------
+
+    def __contains__(self, digest):
+        return self._connect().execute("SELECT 1 FROM submissions WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def citing(self, query):
+        """Submissions citing a work given by DOI, title or full reference."""
+        ref = as_references([query])[0]
+        keys = {reference_key(ref), "title:" + normalize_title(query)}
+        rows = self._connect().execute(
+            "SELECT s.name, s.author, s.checked, c.position + 1, r.raw FROM refs r "
+            "JOIN citations c ON c.ref = r.id JOIN submissions s ON s.id = c.submission "
+            f"WHERE r.key IN ({','.join('?' * len(keys))}) ORDER BY s.checked DESC",
+            list(keys),
+        ).fetchall()
+        return [
+            {"submission": name, "author": author, "checked": checked, "reference": position, "text": raw}
+            for name, author, checked, position, raw in rows
+        ]
+
+    def citing_author(self, author, since=None, until=None):
+        """Submissions citing an author (as in "Highly Cited Authors"), with how often."""
+        since, until = since or "0000-00", until or "9999-99"
+        rows = self._connect().execute(
+            "SELECT s.name, s.author, s.checked, COUNT(*) FROM citation_authors a "
+            "JOIN submissions s ON s.id = a.submission "
+            "WHERE a.author = ? AND s.month BETWEEN ? AND ? GROUP BY s.id ORDER BY 4 DESC, s.checked DESC",
+            (author.strip().lower(), since, until),
+        ).fetchall()
+        return [{"submission": n, "author": a, "checked": c, "citations": k} for n, a, c, k in rows]
+
+    def top_authors(self, since=None, until=None, limit=20):
+        """Most cited authors over months since..until ("YYYY-MM"; default: this quarter)."""
+        if since is None and until is None:
+            since, until = quarter()
+        since, until = since or "0000-00", until or "9999-99"
+        rows = self._connect().execute(
+            "SELECT author, SUM(citations), SUM(submissions) FROM author_months "
+            "WHERE month BETWEEN ? AND ? GROUP BY author ORDER BY 2 DESC, 3 DESC LIMIT ?",
+            (since, until, limit),
+        ).fetchall()
+        return [{"author": a, "citations": c, "submissions": s} for a, c, s in rows]
+
+    def shared_blocks(self, digest):
+        """
+        Runs of at least BLOCK_SIZE consecutive references of a submission
+        that appear in the same order in other submissions.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT id FROM submissions WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return []
+        matches = conn.execute(
+            "SELECT o.submission, s.name, b.position, o.position FROM blocks b "
+            "JOIN block_counts k ON k.hash = b.hash AND k.submissions > 1 "
+            "JOIN blocks o ON o.hash = b.hash AND o.submission != b.submission "
+            "JOIN submissions s ON s.id = o.submission "
+            "WHERE b.submission = ? ORDER BY o.submission, b.position",
+            (row[0],),
+        ).fetchall()
+        by_other = {}
+        for other, name, position, other_position in matches:
+            entry = by_other.setdefault(other, {"submission": name, "here": [], "there": []})
+            entry["here"].append(position)
+            entry["there"].append(other_position)
+        return [
+            {"submission": e["submission"], "references": _ranges(sorted(set(e["here"]))),
+             "their_references": _ranges(sorted(set(e["there"])))}
+            for e in by_other.values()
+        ]
+
+    def reused_blocks(self, limit=20):
+        """Reference blocks found in the most submissions: [{"submissions": [...], "references": [...]}]."""
+        conn = self._connect()
+        hashes = conn.execute(
+            "SELECT hash FROM block_counts WHERE submissions > 1 ORDER BY submissions DESC LIMIT ?", (limit,)
+        ).fetchall()
+        blocks = []
+        for (block,) in hashes:
+            rows = conn.execute(
+                "SELECT s.name, b.submission, b.position FROM blocks b JOIN submissions s ON s.id = b.submission "
+                "WHERE b.hash = ? ORDER BY s.checked", (block,)
+            ).fetchall()
+            _, submission, position = rows[0]
+            references = [raw for (raw,) in conn.execute(
+                "SELECT r.raw FROM citations c JOIN refs r ON r.id = c.ref "
+                "WHERE c.submission = ? AND c.position BETWEEN ? AND ? ORDER BY c.position",
+                (submission, position, position + BLOCK_SIZE - 1),
+            )]
+            blocks.append({"submissions": sorted({name for name, _, _ in rows}), "references": references})
+        return blocks
+
+_corpus = None
+
+def get_corpus():
+    """The corpus named by QAJ_CORPUS, opened once per process (None if unset)."""
+    global _corpus
+    path = os.environ.get("QAJ_CORPUS")
+    if _corpus is None and path:
+        _corpus = CitationCorpus(path)
+    return _corpus
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the cross-submission reference corpus.")
+    parser.add_argument("--corpus", default=os.environ.get("QAJ_CORPUS"), help="corpus file (default: QAJ_CORPUS)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    citing = sub.add_parser("citing", help="submissions citing a DOI, title, reference or author")
+    citing.add_argument("query")
+    citing.add_argument("--author", action="store_true", help="query is an author name")
+    top = sub.add_parser("top-authors", help="most cited authors (default: this quarter)")
+    top.add_argument("--since", help="first month, YYYY-MM")
+    top.add_argument("--until", help="last month, YYYY-MM")
+    top.add_argument("-n", "--limit", type=int, default=20)
+    blocks = sub.add_parser("reused-blocks", help="reference blocks found in several submissions")
+    blocks.add_argument("-n", "--limit", type=int, default=20)
+    backfill = sub.add_parser("import", help="add batch_cli JSON reports from a directory")
+    backfill.add_argument("reports_dir")
+    args = parser.parse_args(argv)
+    if not args.corpus:
+        parser.error("no corpus given (--corpus or QAJ_CORPUS)")
+
+    corpus = CitationCorpus(args.corpus)
+    if args.command == "citing":
+        result = corpus.citing_author(args.query) if args.author else corpus.citing(args.query)
+    elif args.command == "top-authors":
+        result = corpus.top_authors(args.since, args.until, args.limit)
+    elif args.command == "reused-blocks":
+        result = corpus.reused_blocks(args.limit)
+    else:
+        added = skipped = 0
+        for dirpath, _, filenames in os.walk(args.reports_dir):
+            for name in sorted(filenames):
+                if name.endswith(".json"):
+                    if corpus.add_report(os.path.join(dirpath, name)):
+                        added += 1
+                    else:
+                        skipped += 1
+        print(f"Added {added} report(s), skipped {skipped} without SHA-256 or references.", file=sys.stderr)
+        return 0
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+from bisect import bisect_right
+from rule_registry import CITATION_LIST_SEPARATOR, CITATION_TOKEN
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+class IntervalSet:
+    """Sorted, disjoint, inclusive integer intervals."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __contains__(self, n):
+        i = bisect_right(self.starts, n) - 1
+        return i >= 0 and n <= self.ends[i]
+
+    def uncovered(self, start, end):
+        """Parts of [start, end] not yet in the set."""
+        gaps = []
+        i = max(bisect_right(self.starts, start) - 1, 0)
+        cursor = start
+        while i < len(self.starts) and self.starts[i] <= end:
+            if self.ends[i] >= cursor:
+                if self.starts[i] > cursor:
+                    gaps.append((cursor, self.starts[i] - 1))
+                cursor = self.ends[i] + 1
+            i += 1
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def add(self, start, end):
+        lo = bisect_right(self.ends, start - 2)
+        hi = bisect_right(self.starts, end + 1)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+class CitationIndex:
+    """
+    Numeric in-text citations ([3], [1, 4], [2-9]) found in one pass over
+    the text. Every citation is stored as an interval (start, end) together
+    with its character position and paragraph (line) number; ranges are
+    never expanded, so [1–900] costs the same as [1].
+    """
+
+    def __init__(self, text, end=None):
+        # end: stop before this position (e.g. the reference list)
+        self.citations = []  # (start, end, position, paragraph) in text order
+        paragraph = 0
+        last = 0
+        for m in CITATION_TOKEN.finditer(text, 0, len(text) if end is None else end):
+            paragraph += text.count("\n", last, m.start())
+            last = m.start()
+            if m.group(1):
+                start, end = int(m.group(1)), int(m.group(2))
+                if start <= end:
+                    self.citations.append((start, end, m.start(), paragraph))
+            else:
+                for num in CITATION_LIST_SEPARATOR.split(m.group(3)):
+                    if num.isdigit():
+                        n = int(num)
+                        self.citations.append((n, n, m.start(), paragraph))
+        self.cited = _merge((start, end) for start, end, _, _ in self.citations)
+
+    def missing(self, count):
+        """Intervals of 1..count that are never cited."""
+        gaps = []
+        cursor = 1
+        for start, end in self.cited:
+            if start > count:
+                break
+            if start > cursor:
+                gaps.append((cursor, start - 1))
+            cursor = max(cursor, end + 1)
+        if cursor <= count:
+            gaps.append((cursor, count))
+        return gaps
+
+    def beyond(self, count):
+        """Cited intervals that point past the end of a list of count references."""
+        return [(max(start, count + 1), end) for start, end in self.cited if end > count]
+
+    def out_of_order(self):
+        """
+        Intervals of references whose first citation comes after a
+        higher-numbered reference was already cited (numeric styles number
+        references in order of first citation).
+        """
+        seen = IntervalSet()
+        highest = 0
+        late = []
+        for start, end, _, _ in self.citations:
+            for gap_start, gap_end in seen.uncovered(start, end):
+                if gap_start < highest:
+                    late.append((gap_start, min(gap_end, highest - 1)))
+            seen.add(start, end)
+            highest = max(highest, end)
+        return _merge(late)
+
+def format_intervals(intervals):
+    return [str(start) if start == end else f"{start}–{end}" for start, end in intervals]
+
+def expand_intervals(intervals, limit=None):
+    numbers = []
+    for start, end in intervals:
+        end = end if limit is None else min(end, limit)
+        numbers.extend(range(start, end + 1))
+    return numbers
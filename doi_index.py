@@ -0,0 +1,208 @@
+"""
+Offline DOI metadata index built from a bulk dump (e.g. a Crossref public
+data snapshot).
+
+    python doi_index.py build SNAPSHOT [SNAPSHOT ...] -o doi_index.sqlite
+
+SNAPSHOT may be a .json/.jsonl file (optionally .gz) or a directory of
+them. Files may hold one work per line or a {"items": [...]} object.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+from reference import as_references
+from rule_registry import DOI_PREFIX, NON_ALNUM
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    doi TEXT PRIMARY KEY,
+    title TEXT,
+    title_hash TEXT,
+    year INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS works_title_hash ON works(title_hash);
+"""
+
+INSERT_BATCH = 10000
+# SQLite's default limit on bound parameters is 999.
+LOOKUP_BATCH = 500
+
+def normalize_doi(doi):
+    # Same normalization as Reference.doi
+    return DOI_PREFIX.sub("", doi.strip()).rstrip(".").lower()
+
+def normalize_title(title):
+    return NON_ALNUM.sub(" ", title.lower()).strip()
+
+def title_hash(title):
+    return hashlib.blake2b(normalize_title(title).encode(), digest_size=8).hexdigest()
+
+def _work_year(work):
+    for field in ("issued", "published-print", "published-online", "created"):
+        parts = (work.get(field) or {}).get("date-parts") or [[None]]
+        if parts and parts[0] and parts[0][0]:
+            return int(parts[0][0])
+    return None
+
+def _iter_snapshot_files(path):
+    if os.path.isdir(path):
+        for dirpath, _, filenames in os.walk(path):
+            for name in sorted(filenames):
+                if name.endswith((".json", ".jsonl", ".json.gz", ".jsonl.gz")):
+                    yield os.path.join(dirpath, name)
+    else:
+        yield path
+
+def iter_works(path):
+    """Yield (doi, title, title_hash, year) rows from a snapshot."""
+    for file_path in _iter_snapshot_files(path):
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, "rt", encoding="utf-8") as f:
+            if ".jsonl" in os.path.basename(file_path):
+                items = (json.loads(line) for line in f if line.strip())
+            else:
+                data = json.load(f)
+                items = data.get("items", []) if isinstance(data, dict) else data
+            for work in items:
+                if not work.get("DOI"):
+                    continue
+                titles = work.get("title") or [""]
+                title = titles[0] if isinstance(titles, list) else titles
+                yield normalize_doi(work["DOI"]), title, title_hash(title) if title else None, _work_year(work)
+
+def build_index(snapshots, index_path):
+    conn = sqlite3.connect(index_path)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + SCHEMA)
+    count = 0
+    batch = []
+    for snapshot in snapshots:
+        for row in iter_works(snapshot):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany("INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+    if batch:
+        conn.executemany("INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?)", batch)
+        count += len(batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return count
+
+class DoiIndex:
+    """
+    Read-only lookups against an index built by build_index. Hot entries
+    are kept in an in-process LRU; misses are fetched in batched IN queries.
+    Safe to share between threads.
+    """
+
+    def __init__(self, index_path, cache_size=4096):
+        self.conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def _cached(self, key):
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return True, self._cache[key]
+        return False, None
+
+    def _remember(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _lookup_many(self, column, keys):
+        results = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                hit, value = self._cached((column, key))
+                if hit:
+                    results[key] = value
+                else:
+                    missing.append(key)
+            for start in range(0, len(missing), LOOKUP_BATCH):
+                chunk = missing[start:start + LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT {column}, doi, title, year FROM works WHERE {column} IN ({placeholders})", chunk
+                ).fetchall()
+                found = {row[0]: {"doi": row[1], "title": row[2], "year": row[3]} for row in rows}
+                for key in chunk:
+                    results[key] = found.get(key)
+                    self._remember((column, key), results[key])
+        return results
+
+    def lookup_dois(self, dois):
+        """{normalized doi: {"doi", "title", "year"} or None}"""
+        return self._lookup_many("doi", [normalize_doi(d) for d in dois])
+
+    def lookup_titles(self, titles):
+        """{title hash: {"doi", "title", "year"} or None}"""
+        return self._lookup_many("title_hash", [title_hash(t) for t in titles])
+
+def _titles_match(a, b):
+    a, b = set(normalize_title(a).split()), set(normalize_title(b).split())
+    return bool(a and b) and len(a & b) / len(a | b) >= 0.8
+
+def validate_references(refs, index):
+    """
+    Check every reference's DOI, year and title against the index in two
+    batched lookups. Returns new sections for the check_references result.
+    """
+    refs = as_references(refs)
+    with_doi = [r for r in refs if r.doi]
+    without_doi = [r for r in refs if not r.doi and r.title]
+    by_doi = index.lookup_dois([r.doi for r in with_doi])
+    by_title = index.lookup_titles([r.title for r in without_doi])
+
+    not_found, year_mismatch, title_mismatch, missing_doi = [], [], [], []
+    for r in with_doi:
+        work = by_doi[r.doi]
+        if work is None:
+            not_found.append(r.raw)
+            continue
+        if r.year and work["year"] and r.year != work["year"]:
+            year_mismatch.append(f"{r.raw} (registered year: {work['year']})")
+        if r.title and work["title"] and not _titles_match(r.title, work["title"]):
+            title_mismatch.append(f"{r.raw} (registered title: {work['title']})")
+    for r in without_doi:
+        work = by_title[title_hash(r.title)]
+        if work is not None:
+            missing_doi.append(f"{r.raw} (DOI: https://doi.org/{work['doi']})")
+
+    return {
+        "DOI Not Found": not_found,
+        "DOI Year Mismatch": year_mismatch,
+        "DOI Title Mismatch": title_mismatch,
+        "Missing DOI (Found in Index)": missing_doi,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline DOI metadata index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="ingest snapshot files into an index")
+    build.add_argument("snapshots", nargs="+")
+    build.add_argument("-o", "--output", default="doi_index.sqlite")
+    args = parser.parse_args(argv)
+
+    count = build_index(args.snapshots, args.output)
+    print(f"Indexed {count} works into {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
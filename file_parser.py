@@ -1,21 +1,90 @@
-import fitz  # PyMuPDF
-import tempfile
-import docx
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from profiling import timed
 
-def extract_text_from_pdf(uploaded_file):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        tmp_path = tmp_file.name
+# Below this many pages, worker start-up costs more than it saves.
+PARALLEL_MIN_PAGES = 64
 
-    doc = fitz.open(tmp_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
+@contextmanager
+def open_pdf(source):
+    """
+    Open a PDF without copying it to a temp file. source may be a path,
+    bytes-like object, or a binary file object (in-memory buffers are used
+    directly, real files are memory-mapped).
+    """
+    mapped = view = None
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        view = source
+    elif hasattr(source, "getbuffer"):
+        view = source.getbuffer()
+    elif hasattr(source, "fileno"):
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+    else:
+        view = source.read()
 
-    doc.close()
-    return text
+    import fitz  # PyMuPDF, loaded on first use (slow to import)
+    doc = fitz.open(stream=view, filetype="pdf")
+    try:
+        yield doc
+    finally:
+        doc.close()
+        if isinstance(view, memoryview) and view is not source:
+            view.release()
+        if mapped is not None:
+            mapped.close()
 
+def iter_pdf_pages(source, pages=None):
+    """
+    Yield the text of each page lazily. pages is an optional iterable of
+    page numbers (e.g. range(10) or reversed(range(n))); by default every
+    page is yielded in order. Stop iterating to stop extracting.
+    """
+    with open_pdf(source) as doc:
+        for number in range(doc.page_count) if pages is None else pages:
+            yield doc[number].get_text()
+
+def pdf_page_count(source):
+    with open_pdf(source) as doc:
+        return doc.page_count
+
+def _extract_page_range(source, start, stop):
+    return "".join(iter_pdf_pages(source, range(start, stop)))
+
+@timed()
+def extract_text_from_pdf_parallel(source, workers=None, chunk_pages=16):
+    """
+    Extract page ranges in worker processes. source should be a path (each
+    worker maps the file itself) or bytes.
+    """
+    if hasattr(source, "read"):
+        source = bytes(source.getbuffer()) if hasattr(source, "getbuffer") else source.read()
+    count = pdf_page_count(source)
+    starts = list(range(0, count, chunk_pages))
+    stops = [min(start + chunk_pages, count) for start in starts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return "".join(pool.map(_extract_page_range, [source] * len(starts), starts, stops))
+
+@timed()
+def extract_text_from_pdf(uploaded_file, workers=None):
+    if hasattr(uploaded_file, "read") and not hasattr(uploaded_file, "getbuffer") \
+            and not hasattr(uploaded_file, "fileno"):
+        uploaded_file = uploaded_file.read()  # not re-readable, buffer it once
+    if workers and workers > 1 and pdf_page_count(uploaded_file) >= PARALLEL_MIN_PAGES:
+        return extract_text_from_pdf_parallel(uploaded_file, workers)
+    return "".join(iter_pdf_pages(uploaded_file))
+
+@timed()
 def extract_text_from_docx(uploaded_file):
-    doc = docx.Document(uploaded_file)
-    text = "\n".join([para.text for para in doc.paragraphs])
-    return text
+    from docx import Document
+    return docx_text(Document(uploaded_file))
+
+def docx_text(doc):
+    """Plain text of an already parsed python-docx Document."""
+    return "\n".join([para.text for para in doc.paragraphs])
@@ -1,16 +1,36 @@
 from docx import Document
-from docx.shared import Pt
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Emu, Pt
 import re
 import string
+import time
+from collections import namedtuple
+from functools import partial
+from page_layout import check_docx_layout
+from profiling import current_recorder, stage, timed
+from section_index import SectionIndex
+from style_profile import ProfileError, has_length, length, resolve_profile
+from style_resolver import RUN_PROPERTIES, resolver_for
 
-def get_paragraph_info(para):
-    run = para.runs[0] if para.runs else None
+def get_paragraph_info(para, resolver=None):
+    """
+    Formatting of a paragraph. Run properties are the effective ones (styles
+    and document defaults applied): "runs" holds a RunSpan per stretch of
+    differently formatted text, the top-level font keys are its first span.
+    Span offsets count from the start of the unstripped text, "text_offset"
+    characters before "text".
+    """
+    spans = (resolver or resolver_for(para.part)).run_spans(para._p)
+    run = spans[0] if spans else None
+    raw = para.text
     return {
-        "text": para.text.strip(),
-        "font_size": run.font.size.pt if run and run.font.size else None,
+        "text": raw.strip(),
+        "text_offset": len(raw) - len(raw.lstrip()),
+        "runs": spans,
+        "font_size": run.font_size if run else None,
         "bold": run.bold if run else False,
         "italic": run.italic if run else False,
-        "color": str(run.font.color.rgb) if run and run.font.color and run.font.color.rgb else None,
+        "color": run.color if run else None,
         "alignment": para.alignment,
         "first_line_indent": para.paragraph_format.first_line_indent,
         "left_indent": para.paragraph_format.left_indent,
@@ -18,148 +38,423 @@ def get_paragraph_info(para):
         "spacing_before": para.paragraph_format.space_before.pt if para.paragraph_format.space_before else 0,
         "spacing_after": para.paragraph_format.space_after.pt if para.paragraph_format.space_after else 0,
         "style_name": para.style.name,
-        "font_name": run.font.name if run and run.font.name else None,
+        "font_name": run.font_name if run else None,
     }
 
 def clean_text(text):
     return text.strip() if text and text.strip() and any(c.isalnum() for c in text) else ""
 
-def check_font_and_spacing(file_path):
-    doc = Document(file_path)
-    issues = []
-    for para in doc.paragraphs:
-        info = get_paragraph_info(para)
+# Section names for the DOCX checks, in the order they are reported.
+FONT_SECTION = "Font Checks"
+PARAGRAPH_SECTION = "Paragraph Format"
+MARGIN_SECTION = "Margin Checks"
+SUBHEADING_SECTION = "Subheading Checks"
+BULLET_SECTION = "Bullet Point Checks"
+REFERENCE_STYLE_SECTION = "References Style Checks"
+
+@timed()
+def paragraph_records(doc, profile=None):
+    """
+    Walk the document once and return a compact record per non-empty
+    paragraph. Each record is the get_paragraph_info dict plus:
+      - "index": position of the paragraph in the document
+      - "region": "body", "references_heading" or "references"
+    """
+    records = []
+    resolver = resolver_for(doc.part)
+    for index, para in enumerate(doc.paragraphs):
+        info = get_paragraph_info(para, resolver)
         text = clean_text(info["text"])
         if not text:
             continue
-        if not info["font_name"] or "palatino" not in info["font_name"].lower():
-            issues.append(f"Font not Palatino Linotype in: '{text[:80]}'")
-        if info["font_size"] and info["font_size"] != 12:
-            issues.append(f"Font size is {info['font_size']} pt instead of 12 pt: '{text[:80]}'")
-    return issues
+        info["text"] = text
+        info["index"] = index
+        records.append(info)
+    return assign_regions(records, references_heading(profile))
 
-def check_paragraph_format(file_path):
-    doc = Document(file_path)
-    issues = []
-    for para in doc.paragraphs:
-        info = get_paragraph_info(para)
-        text = clean_text(info["text"])
-        if not text:
+def references_heading(profile=None):
+    return resolve_profile(profile).section("references_heading").get("text", "References")
+
+def assign_regions(records, heading="References"):
+    in_references = False
+    for info in records:
+        if info["text"] == heading:
+            info["region"] = "references_heading"
+            in_references = True
+        else:
+            info["region"] = "references" if in_references else "body"
+    return records
+
+# --- compiled rule table ------------------------------------------------
+# Each row is one property a paragraph must have. region limits the row to
+# "body", "references_heading" or "references" paragraphs; selector to
+# paragraphs matching ("style_prefix", prefix) or ("pattern", regex). field
+# is a paragraph record key, or a tuple of keys compared by their maximum;
+# run properties (RUN_PROPERTIES) are checked on every run span. Lengths in
+# expected/tolerance are EMU. optional rows skip unset values.
+Check = namedtuple("Check", ["region", "selector", "field", "op", "expected", "tolerance", "message", "optional"])
+
+ALIGNMENTS = {
+    "left": (WD_ALIGN_PARAGRAPH.LEFT, "left-aligned"),
+    "center": (WD_ALIGN_PARAGRAPH.CENTER, "centered"),
+    "right": (WD_ALIGN_PARAGRAPH.RIGHT, "right-aligned"),
+    "justify": (WD_ALIGN_PARAGRAPH.JUSTIFY, "justified"),
+}
+# line_spacing of a paragraph is a multiple of single spacing (or unset)
+LINE_SPACINGS = {"single": 1.0, "1.5": 1.5, "double": 2.0}
+
+# Records hold font sizes and spacing in points, indents as EMU lengths.
+EMU_PER_PT = 12700
+
+OPS = {
+    "contains": lambda value, row: bool(value) and row.expected in value.lower(),
+    "equals": lambda value, row: value == row.expected,
+    "true": lambda value, row: bool(value),
+    "pt": lambda value, row: value is not None and abs(value * EMU_PER_PT - row.expected) <= row.tolerance,
+    "pt_min": lambda value, row: value * EMU_PER_PT >= row.expected - row.tolerance,
+    "pt_max": lambda value, row: value * EMU_PER_PT <= row.expected + row.tolerance,
+    "emu": lambda value, row: bool(value) and abs(value - row.expected) <= row.tolerance,
+    "color": lambda value, row: value is not None and value.upper() == row.expected,
+    "line_spacing": lambda value, row: value is None or value == row.expected,
+}
+
+def check(field, op, expected, message, region=None, selector=None, tolerance=0, optional=False):
+    return Check(region, selector, field, op, expected, tolerance, message, optional)
+
+def pt(emu):
+    return f"{Emu(emu).pt:g}"
+
+def inches(emu):
+    return f"{Emu(emu).inches:g}"
+
+def _alignment(section):
+    if section.get("alignment") not in ALIGNMENTS:
+        raise ProfileError(f"Unknown alignment {section.get('alignment')!r} (use one of {', '.join(ALIGNMENTS)})")
+    return ALIGNMENTS[section["alignment"]]
+
+def _line_spacing(section):
+    if section["line_spacing"] not in LINE_SPACINGS:
+        raise ProfileError(f"Unknown line spacing {section['line_spacing']!r} (use one of {', '.join(LINE_SPACINGS)})")
+    return LINE_SPACINGS[section["line_spacing"]]
+
+def font_rows(profile):
+    body = profile.section("body")
+    rows = []
+    if "font" in body:
+        rows.append(check("font_name", "contains", body.get("font_match", body["font"]).lower(),
+                          f"Font not {body['font']} in: '{{short}}'"))
+    if has_length(body, "font_size"):
+        size = length(body, "font_size")
+        rows.append(check("font_size", "pt", size, f"Font size is {{value}} pt instead of {pt(size)} pt: '{{short}}'",
+                          tolerance=length(body, "font_size_tolerance", 0), optional=True))
+    return rows
+
+def paragraph_rows(profile):
+    body = profile.section("body")
+    rows = []
+    if "alignment" in body:
+        alignment, name = _alignment(body)
+        rows.append(check("alignment", "equals", alignment, f"Paragraph not {name}: '{{short}}'"))
+    if has_length(body, "first_line_indent"):
+        indent = length(body, "first_line_indent")
+        rows.append(check("first_line_indent", "emu", indent,
+                          f"Paragraph missing first-line indent (should be {inches(indent)}\"): '{{short}}'",
+                          tolerance=length(body, "indent_tolerance", 0)))
+    return rows
+
+def subheading_rows(profile):
+    rows = []
+    for key, label in (("subheading", "Subheading"), ("sub_subheading", "Sub-subheading")):
+        level = profile.section(key)
+        if "pattern" not in level:
             continue
-        if para.alignment != 3:  # Justified
-            issues.append(f"Paragraph not justified: '{text[:80]}'")
-        if not info["first_line_indent"] or abs(info["first_line_indent"].inches - 0.2) > 0.05:
-            issues.append(f"Paragraph missing first-line indent (should be 0.2\"): '{text[:80]}'")
-    return issues
+        selector = ("pattern", re.compile(level["pattern"]))
+        if level.get("italic"):
+            rows.append(check("italic", "true", True, f"{label} not italic: '{{text}}'", selector=selector))
+        if has_length(level, "space_before"):
+            space = length(level, "space_before")
+            rows.append(check("spacing_before", "pt_min", space, f"{label} spacing before should be {pt(space)} pt: '{{text}}'",
+                              selector=selector, tolerance=length(level, "space_tolerance", 0)))
+    return rows
 
-def check_margins(file_path):
-    return ["Top margin is not 1 inch."]  # Placeholder; python-docx cannot detect margins
+def bullet_rows(profile):
+    bullets = profile.section("bullets")
+    selector = ("style_prefix", bullets.get("style_prefix", "list").lower())
+    rows = []
+    if has_length(bullets, "font_size"):
+        size = length(bullets, "font_size")
+        rows.append(check("font_size", "pt", size, f"Bullet point font size not {pt(size)} pt: '{{short}}'",
+                          selector=selector, tolerance=length(bullets, "font_size_tolerance", 0)))
+    if has_length(bullets, "left_indent"):
+        indent = length(bullets, "left_indent")
+        rows.append(check("left_indent", "emu", indent, f"Bullet indent not {inches(indent)} inch: '{{short}}'",
+                          selector=selector, tolerance=length(bullets, "indent_tolerance", 0)))
+    if "alignment" in bullets:
+        alignment, name = _alignment(bullets)
+        rows.append(check("alignment", "equals", alignment, f"Bullet point not {name}: '{{short}}'", selector=selector))
+    return rows
 
-def check_headings(text):
-    required = ["ABSTRACT", "INTRODUCTION", "LITERATURE REVIEW", "METHOD", "RESULT", "DISCUSSION", "CONCLUSION", "REFERENCES"]
-    found = [h for h in required if h in text.upper()]
-    missing = set(required) - set(found)
-    return [f"Missing heading: {m}" for m in missing]
+def reference_style_rows(profile):
+    heading = profile.section("references_heading")
+    title = heading.get("text", "References")
+    rows = []
+    region = "references_heading"
+    if has_length(heading, "font_size"):
+        size = length(heading, "font_size")
+        rows.append(check("font_size", "pt", size, f"❌ '{title}' heading should be {pt(size)} pt.", region,
+                          tolerance=length(heading, "font_size_tolerance", 0)))
+    if "color" in heading:
+        color = heading["color"].lstrip("#").upper()
+        described = f"{heading['color_name']} (hex #{color})" if "color_name" in heading else f"#{color}"
+        rows.append(check("color", "color", color, f"❌ '{title}' heading should be {described}.", region))
+    if has_length(heading, "space_before"):
+        space = length(heading, "space_before")
+        rows.append(check("spacing_before", "pt", space, f"❌ '{title}' heading should have {pt(space)} pt spacing before.",
+                          region, tolerance=length(heading, "space_tolerance", 0)))
+    if "line_spacing" in heading:
+        rows.append(check("line_spacing", "line_spacing", _line_spacing(heading),
+                          f"❌ '{title}' heading should have {heading['line_spacing']} line spacing.", region))
 
-def check_tables_figures(text):
-    issues = []
-    table_titles = re.findall(r"(Table\s+\d+)[\.:]?", text, re.IGNORECASE)
-    table_refs = re.findall(r"(Table\s+\d+)", text, re.IGNORECASE)
-
-    figure_titles = re.findall(r"(FIGURE\s+\d+)[\.:]?", text, re.IGNORECASE)
-    figure_refs = re.findall(r"(FIGURE\s+\d+)", text, re.IGNORECASE)
-
-    table_title_set = set([t.lower() for t in table_titles])
-    table_ref_set = set([r.lower() for r in table_refs])
-    for t in table_title_set:
-        if t not in table_ref_set:
-            issues.append(f"{t.title()} not referenced in text.")
-
-    figure_title_set = set([f.lower() for f in figure_titles])
-    figure_ref_set = set([f.lower() for f in figure_refs])
-    for f in figure_title_set:
-        if f not in figure_ref_set:
-            issues.append(f"{f.upper()} not referenced in text.")
-    return issues
+    references = profile.section("references")
+    region = "references"
+    if has_length(references, "font_size"):
+        size = length(references, "font_size")
+        rows.append(check("font_size", "pt", size, f"❌ Font size should be {pt(size)} pt in: '{{short}}'", region,
+                          tolerance=length(references, "font_size_tolerance", 0)))
+    if "font" in references:
+        rows.append(check("font_name", "contains", references.get("font_match", references["font"]).lower(),
+                          f"❌ Font should be {references['font']} in: '{{short}}'", region))
+    if "alignment" in references:
+        alignment, name = _alignment(references)
+        rows.append(check("alignment", "equals", alignment, f"❌ Reference not {name}: '{{short}}'", region))
+    if has_length(references, "hanging_indent"):
+        indent = length(references, "hanging_indent")
+        rows.append(check("left_indent", "emu", indent, f"❌ Hanging indent should be {inches(indent)} inch in: '{{short}}'",
+                          region, tolerance=length(references, "indent_tolerance", 0)))
+    if has_length(references, "space"):
+        space = length(references, "space")
+        rows.append(check(("spacing_before", "spacing_after"), "pt_max", space,
+                          f"❌ Spacing before/after text should be {pt(space)} in: '{{short}}'",
+                          region, tolerance=length(references, "space_tolerance", 0)))
+    if "line_spacing" in references:
+        rows.append(check("line_spacing", "line_spacing", _line_spacing(references),
+                          f"❌ Line spacing should be {references['line_spacing']} in: '{{short}}'", region))
+    return rows
 
-def check_subheadings(file_path):
-    doc = Document(file_path)
-    issues = []
-    for para in doc.paragraphs:
-        info = get_paragraph_info(para)
-        text = clean_text(info['text'])
-        if not text:
+def reference_heading_document_rule(records, profile=None):
+    if not any(info["region"] == "references_heading" for info in records):
+        return [f"❌ '{references_heading(profile)}' heading not found in the document."]
+    return []
+
+# Rule table compilers, one per report section; the compiled rows of every
+# section are checked against each paragraph record in a single pass.
+PARAGRAPH_RULES = {
+    FONT_SECTION: font_rows,
+    PARAGRAPH_SECTION: paragraph_rows,
+    SUBHEADING_SECTION: subheading_rows,
+    BULLET_SECTION: bullet_rows,
+    REFERENCE_STYLE_SECTION: reference_style_rows,
+}
+
+# Checks that need the whole record stream (run after the paragraph pass).
+DOCUMENT_RULES = {
+    REFERENCE_STYLE_SECTION: reference_heading_document_rule,
+}
+
+def _group(rows):
+    # Consecutive rows with the same region/selector share one applicability test
+    groups = []
+    for row in rows:
+        if groups and groups[-1][0] == row.region and groups[-1][1] == row.selector:
+            groups[-1][2].append(row)
+        else:
+            groups.append((row.region, row.selector, [row]))
+    return tuple((region, selector, tuple(rows)) for region, selector, rows in groups)
+
+def compile_rules(profile):
+    return {section: _group(compile(profile)) for section, compile in PARAGRAPH_RULES.items()}
+
+def rule_table(profile=None):
+    """{section: grouped rows} for a profile (name, StyleProfile or None), compiled once per profile."""
+    return resolve_profile(profile).compiled("paragraph_rules", compile_rules)
+
+def _selected(selector, info):
+    kind, value = selector
+    if kind == "style_prefix":
+        return info["style_name"].lower().startswith(value)
+    return value.match(info["text"]) is not None
+
+def _run_issue(row, info):
+    # Failing spans, adjacent ones with the same value merged into one
+    failing = []
+    failed = 0
+    previous_failed = False
+    for span in info["runs"]:
+        value = getattr(span, row.field)
+        if (value is None and row.optional) or OPS[row.op](value, row):
+            previous_failed = False
             continue
-        if re.match(r"\d+\.\s+[A-Z ]+$", text):
-            if not info["italic"]:
-                issues.append(f"Subheading not italic: '{text}'")
-            if info["spacing_before"] < 10:
-                issues.append(f"Subheading spacing before should be 12 pt: '{text}'")
-        elif re.match(r"\d+\.\d+\s+[A-Z][a-z]+", text):
-            if not info["italic"]:
-                issues.append(f"Sub-subheading not italic: '{text}'")
-            if info["spacing_before"] < 5:
-                issues.append(f"Sub-subheading spacing before should be 6 pt: '{text}'")
-    return issues
+        failed += 1
+        if previous_failed and failing[-1][2] == value:
+            failing[-1][1] = span.end
+        else:
+            failing.append([span.start, span.end, value])
+        previous_failed = True
+    if not failing:
+        return None
+    text = info["text"]
+    issue = row.message.format(text=text, short=text[:80], value=failing[0][2])
+    if failed < len(info["runs"]) or len(failing) > 1:  # only part of the paragraph
+        # Positions in the quoted (stripped) text
+        offset = info["text_offset"]
+        issue += " (" + "; ".join(
+            f"characters {max(start - offset, 0) + 1}–{min(end - offset, len(text))}"
+            + ("" if isinstance(value, bool) else f": {value}")
+            for start, end, value in failing
+        ) + ")"
+    return issue
 
-def check_bullet_points(file_path):
-    doc = Document(file_path)
+def evaluate(groups, info):
+    """Issues of one paragraph record against a section's compiled rows."""
     issues = []
-    for para in doc.paragraphs:
-        text = clean_text(para.text)
-        if not text:
+    for region, selector, rows in groups:
+        if region is not None and info["region"] != region:
             continue
-        if para.style.name.lower().startswith("list"):
-            info = get_paragraph_info(para)
-            if info["font_size"] != 10:
-                issues.append(f"Bullet point font size not 10 pt: '{text[:80]}'")
-            if not info["left_indent"] or abs(info["left_indent"].inches - 0.19) > 0.05:
-                issues.append(f"Bullet indent not 0.19 inch: '{text[:80]}'")
-            if para.alignment != 3:
-                issues.append(f"Bullet point not justified: '{text[:80]}'")
+        if selector is not None and not _selected(selector, info):
+            continue
+        for row in rows:
+            if row.field in RUN_PROPERTIES and info["runs"]:
+                issue = _run_issue(row, info)
+                if issue:
+                    issues.append(issue)
+                continue
+            value = max(info[f] for f in row.field) if isinstance(row.field, tuple) else info[row.field]
+            if value is None and row.optional:
+                continue
+            if not OPS[row.op](value, row):
+                issues.append(row.message.format(text=info["text"], short=info["text"][:80], value=value))
     return issues
 
-def check_reference_formatting(file_path):
-    doc = Document(file_path)
-    issues = []
-    found_references = False
-    checking_refs = False
+def paragraph_issues(info, sections, table=None):
+    table = table or rule_table()
+    return {section: evaluate(table[section], info) for section in sections if section in table}
 
-    for para in doc.paragraphs:
-        text = clean_text(para.text)
-        if not text:
-            continue
+def _timed_paragraph_issues(rule_seconds, table):
+    # Per-rule wall time, summed over the paragraph pass and reported once
+    def results_for(info, sections):
+        results = {}
+        for section in sections:
+            if section in table:
+                started = time.perf_counter()
+                results[section] = evaluate(table[section], info)
+                rule_seconds[section] += time.perf_counter() - started
+        return results
+    return results_for
 
-        if text == "References":
-            found_references = True
-            info = get_paragraph_info(para)
-            if info["font_size"] != 10:
-                issues.append("❌ 'References' heading should be 10 pt.")
-            if info["color"] not in ["0000FF", "0000ff"]:
-                issues.append("❌ 'References' heading should be blue (hex #0000FF).")
-            if abs(info["spacing_before"] - 17) > 1:
-                issues.append("❌ 'References' heading should have 17 pt spacing before.")
-            if str(info["line_spacing"]).lower() != "single":
-                issues.append("❌ 'References' heading should have single line spacing.")
-            checking_refs = True
-            continue
+@timed()
+def run_rules(records, sections=None, results_for=None, profile=None):
+    """
+    Apply the profile's paragraph rules to every record, then the document
+    rules. results_for(info, sections) may be given to supply per-paragraph
+    results from elsewhere (e.g. a cache); it defaults to paragraph_issues.
+    """
+    sections = list(PARAGRAPH_RULES) if sections is None else sections
+    profile = resolve_profile(profile)
+    recorder = current_recorder()
+    rule_seconds = dict.fromkeys(sections, 0.0)
+    if results_for is None:
+        table = rule_table(profile)
+        if recorder:
+            results_for = _timed_paragraph_issues(rule_seconds, table)
+        else:
+            results_for = partial(paragraph_issues, table=table)
+    results = {section: [] for section in sections}
+    for info in records:
+        for section, issues in results_for(info, sections).items():
+            results[section].extend(issues)
+    if recorder:
+        for section, seconds in rule_seconds.items():
+            if seconds:
+                recorder.add(f"format_checker.rule.{section}", seconds)
+    for section in sections:
+        if section in DOCUMENT_RULES:
+            results[section].extend(DOCUMENT_RULES[section](records, profile))
+    return results
 
-        if checking_refs:
-            info = get_paragraph_info(para)
-            if info["font_size"] != 8:
-                issues.append(f"❌ Font size should be 8 pt in: '{text[:80]}'")
-            if not info["font_name"] or "palatino" not in info["font_name"].lower():
-                issues.append(f"❌ Font should be Palatino Linotype in: '{text[:80]}'")
-            if info["alignment"] != 3:
-                issues.append(f"❌ Reference not justified: '{text[:80]}'")
-            if not info["left_indent"] or abs(info["left_indent"].inches - 0.25) > 0.05:
-                issues.append(f"❌ Hanging indent should be 0.25 inch in: '{text[:80]}'")
-            if info["spacing_before"] > 1 or info["spacing_after"] > 1:
-                issues.append(f"❌ Spacing before/after text should be 0 in: '{text[:80]}'")
-            if str(info["line_spacing"]).lower() != "single":
-                issues.append(f"❌ Line spacing should be single in: '{text[:80]}'")
-
-    if not found_references:
-        issues.append("❌ 'References' heading not found in the document.")
+@timed()
+def analyze_docx(file_path, sections=None, profile=None):
+    """
+    Parse a DOCX once and run every formatting rule of the style profile
+    (default: QAJ) over it. Returns {section name: [issues]} for the
+    requested sections (all DOCX sections by default, including margins).
+    """
+    profile = resolve_profile(profile)
+    with stage("format_checker.parse_docx"):
+        doc = Document(file_path)
+    results = run_rules(paragraph_records(doc, profile), sections, profile=profile)
+    if sections is None or MARGIN_SECTION in sections:
+        results[MARGIN_SECTION] = check_margins(doc, profile)
+    return results
 
+def check_font_and_spacing(file_path):
+    return analyze_docx(file_path, [FONT_SECTION])[FONT_SECTION]
+
+def check_paragraph_format(file_path):
+    return analyze_docx(file_path, [PARAGRAPH_SECTION])[PARAGRAPH_SECTION]
+
+@timed()
+def check_margins(doc, profile=None):
+    """Page size, margins and columns of every section of a DOCX (a path or a parsed Document)."""
+    if not hasattr(doc, "sections"):
+        doc = Document(doc)
+    return check_docx_layout(doc, profile)
+
+REQUIRED_HEADINGS = ["ABSTRACT", "INTRODUCTION", "LITERATURE REVIEW", "METHOD", "RESULT", "DISCUSSION", "CONCLUSION", "REFERENCES"]
+
+@timed()
+def check_headings(text, index=None):
+    index = index or SectionIndex(text)
+    return [f"Missing heading: {h}" for h in REQUIRED_HEADINGS if not index.has_heading(h)]
+
+def _caption_label(kind, number):
+    return f"Table {number}" if kind == "table" else f"FIGURE {number}"
+
+@timed()
+def check_tables_figures(text, index=None):
+    """
+    Every table/figure caption must be referenced in the text, and first
+    referenced before the caption itself; captions must be numbered in
+    order, and mentioned numbers must have a caption.
+    """
+    index = index or SectionIndex(text)
+    issues = []
+    for kind in ("table", "figure"):
+        captions = sorted(
+            (positions[0], number) for (k, number), positions in index.captions.items() if k == kind
+        )
+        highest = 0
+        for pos, number in captions:
+            label = _caption_label(kind, number)
+            mention = index.first_mention(kind, number)
+            if mention is None:
+                issues.append(f"{label} not referenced in text.")
+            elif mention > pos:
+                issues.append(f"{label} first referenced after its caption.")
+            if number < highest:
+                issues.append(f"{label} caption appears after {_caption_label(kind, highest)}.")
+            highest = max(highest, number)
+        # Without any text captions (e.g. captions inside images) this can't be told
+        if captions:
+            for number in index.mentioned_numbers(kind):
+                if (kind, number) not in index.captions:
+                    issues.append(f"{_caption_label(kind, number)} referenced but has no caption.")
     return issues
+
+def check_subheadings(file_path):
+    return analyze_docx(file_path, [SUBHEADING_SECTION])[SUBHEADING_SECTION]
+
+def check_bullet_points(file_path):
+    return analyze_docx(file_path, [BULLET_SECTION])[BULLET_SECTION]
+
+def check_reference_formatting(file_path):
+    return analyze_docx(file_path, [REFERENCE_STYLE_SECTION])[REFERENCE_STYLE_SECTION]
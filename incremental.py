@@ -0,0 +1,186 @@
+import hashlib
+from collections import Counter
+from functools import partial
+from docx import Document
+from lxml import etree
+
+from file_parser import docx_text
+from format_checker import (
+    DOCUMENT_RULES,
+    MARGIN_SECTION,
+    PARAGRAPH_RULES,
+    assign_regions,
+    check_margins,
+    clean_text,
+    get_paragraph_info,
+    paragraph_issues,
+    references_heading,
+    rule_table,
+)
+from pipeline import (
+    MAX_WORKERS,
+    Task,
+    collect_entry,
+    formatting_results,
+    get_doi_index,
+    is_pdf,
+    pdf_tasks,
+    run_tasks,
+    text_tasks,
+)
+from profiling import timed
+from reference import Reference
+from report_sections import NON_ISSUE_KEYS
+from style_profile import resolve_profile
+from style_resolver import resolver_for
+
+def fingerprint(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def issue_counter(entry):
+    """Flatten an analysis entry into a multiset of (section, issue)."""
+    issues = Counter()
+    for section, items in formatting_results(entry).items():
+        issues.update((section, str(item)) for item in items)
+
+    def add(section, value):
+        if isinstance(value, dict):
+            for key, sub in value.items():
+                add(f"{section} / {key}", sub)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict) and "references" in item:
+                    item = " | ".join(item["references"])
+                issues[(section, str(item))] += 1
+
+    for section, value in entry["ref_report"].items():
+        if section not in NON_ISSUE_KEYS:
+            add(section, value)
+    return issues
+
+def diff_issues(previous, current):
+    """Issues fixed and introduced between two issue_counter() results."""
+    def group(counter):
+        grouped = {}
+        for (section, issue), count in sorted(counter.items()):
+            grouped.setdefault(section, []).extend([issue] * count)
+        return grouped
+    return {"fixed": group(previous - current), "introduced": group(current - previous)}
+
+class IncrementalChecker:
+    """
+    Re-checks successive revisions of the same manuscript.
+
+    DOCX paragraphs are fingerprinted by their raw XML (salted with the
+    styles part, since style changes alter effective formatting) and
+    references by their text. Records, rule results and parsed Reference
+    objects seen in the previous revision are reused; only new or changed
+    content is evaluated. Caches only keep what the latest revision used, so
+    memory stays proportional to one manuscript.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._paragraph_results = {}
+        self._references = {}
+        self.previous_issues = None
+        self.stats = {}
+
+    def _reference_factory(self, used):
+        def make_reference(raw):
+            ref = self._references.get(raw)
+            if ref is None:
+                self.stats["evaluated"] += 1
+                ref = Reference(raw)
+            else:
+                self.stats["reused"] += 1
+            used[raw] = ref
+            return ref
+        return make_reference
+
+    @timed("incremental.docx_records")
+    def _docx_records(self, doc, profile):
+        styles_salt = fingerprint(etree.tostring(doc.styles.element))
+        resolver = resolver_for(doc.part)
+        records, used = [], {}
+        for index, para in enumerate(doc.paragraphs):
+            key = fingerprint(styles_salt, etree.tostring(para._p))
+            if key in self._records:
+                base = self._records[key]
+            else:
+                base = get_paragraph_info(para, resolver)
+                base["text"] = clean_text(base["text"])
+            used[key] = base
+            if base["text"]:
+                records.append(dict(base, index=index, fingerprint=key))
+        self._records = used
+        return assign_regions(records, references_heading(profile))
+
+    @timed("incremental.docx_results")
+    def _docx_results(self, records, profile):
+        sections = list(PARAGRAPH_RULES)
+        table = rule_table(profile)
+        results = {section: [] for section in sections}
+        used = {}
+        for info in records:
+            key = (info["fingerprint"], info["region"], profile.key)
+            issues = self._paragraph_results.get(key)
+            if issues is None:
+                self.stats["evaluated"] += 1
+                issues = paragraph_issues(info, sections, table)
+            else:
+                self.stats["reused"] += 1
+            used[key] = issues
+            for section in sections:
+                results[section].extend(issues[section])
+        self._paragraph_results = used
+        for section, rule in DOCUMENT_RULES.items():
+            results[section].extend(rule(records, profile))
+        return results
+
+    def iter_check(self, source, max_workers=MAX_WORKERS, name=None, profile=None):
+        """
+        Like pipeline.iter_analysis: yield (name, value) as each check
+        finishes, reusing cached results, then a final ("revision", ...)
+        with the issues fixed/introduced since the previous call and how
+        many paragraph/reference results were reused.
+        """
+        self.stats = {"reused": 0, "evaluated": 0}
+        used_references = {}
+        profile = resolve_profile(profile)
+        if is_pdf(source if name is None else name):
+            tasks = pdf_tasks(profile)
+        else:
+            tasks = [
+                Task("document", Document, ("source",)),
+                Task("text", docx_text, ("document",)),
+                Task("records", partial(self._docx_records, profile=profile), ("document",)),
+                Task("docx_results", partial(self._docx_results, profile=profile), ("records",)),
+                Task(MARGIN_SECTION, partial(check_margins, profile=profile), ("document",)),
+            ]
+        tasks += text_tasks(
+            profile, make_reference=self._reference_factory(used_references), doi_index=get_doi_index()
+        )
+
+        results = []
+        for name, value in run_tasks(tasks, {"source": source}, max_workers):
+            results.append((name, value))
+            yield name, value
+        self._references = used_references
+
+        issues = issue_counter(collect_entry(results))
+        yield "revision", dict(
+            diff_issues(self.previous_issues, issues) if self.previous_issues is not None
+            else {"fixed": {}, "introduced": {}},
+            first_revision=self.previous_issues is None,
+            **self.stats,
+        )
+        self.previous_issues = issues
+
+    def check(self, source, max_workers=MAX_WORKERS, name=None, profile=None):
+        """Analyze source like pipeline.analyze_file, plus the "revision" diff."""
+        return collect_entry(self.iter_check(source, max_workers, name, profile))
@@ -0,0 +1,474 @@
+"""
+Local analysis service: a SQLite job queue served by pre-warmed worker
+processes, so heavy manuscripts never run on a Streamlit session thread
+and concurrent users do not share one interpreter.
+
+    service = JobService()                 # starts QAJ_WORKERS processes (default 2)
+    job_id = service.submit_analysis("paper.docx", data, style="qaj")
+    service.status(job_id)                 # Job(status="running", progress=[...])
+    service.result(job_id)                 # the analysis entry once "done"
+    service.cancel(job_id)
+
+Each worker pre-imports the PDF, DOCX and report libraries, so it holds a
+few hundred MB; raise QAJ_WORKERS only as far as memory allows.
+
+With QAJ_CORPUS set, workers also add each analyzed manuscript's references
+to the cross-submission corpus (citation_corpus.py).
+
+Uploads up to QAJ_SPILL_MB travel in the job itself, larger ones (or once
+QAJ_UPLOAD_MEMORY_MB is held by queued and running jobs) are spilled to
+QAJ_SPILL_DIR; see upload_store.py.
+
+The queue lives in QAJ_JOB_DB (default: jobs.sqlite in the temp dir), so
+workers can also run on their own, e.g. next to an app started with
+QAJ_WORKERS=0:
+
+    python job_service.py -j 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, namedtuple
+from io import BytesIO
+
+from profiling import recording
+from report_sections import NON_ISSUE_KEYS
+from upload_store import UploadStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    spool_path TEXT,
+    upload_bytes INTEGER NOT NULL DEFAULT 0,
+    revision_key TEXT,
+    progress TEXT NOT NULL DEFAULT '[]',
+    cancel INTEGER NOT NULL DEFAULT 0,
+    result BLOB,
+    error TEXT,
+    worker INTEGER,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, submitted);
+CREATE TABLE IF NOT EXISTS revisions (
+    key TEXT PRIMARY KEY,
+    issues TEXT NOT NULL,
+    updated REAL NOT NULL,
+    worker INTEGER
+);
+CREATE INDEX IF NOT EXISTS revisions_updated ON revisions(updated);
+"""
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+POLL_SECONDS = 0.2
+# Worker processes started by default (QAJ_WORKERS, or -j when run standalone).
+DEFAULT_WORKERS = 2
+# Finished jobs (and their results) are kept this long for polling clients.
+KEEP_SECONDS = 3600
+# Incremental checkers kept per worker, one per revision key.
+MAX_REVISION_CHECKERS = 16
+# Revisions not re-uploaded for this long are forgotten.
+REVISION_KEEP_SECONDS = 24 * 3600
+# A revision waits this long for the worker holding its incremental checker
+# (which reuses the previous revision's results) before any worker takes it.
+AFFINITY_SECONDS = 5
+
+Job = namedtuple("Job", ["id", "kind", "status", "progress", "error", "submitted", "started", "finished", "ahead"])
+
+class QueueFull(RuntimeError):
+    pass
+
+def _alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)  # signal 0 only checks that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """The jobs table; safe to share between threads and processes."""
+
+    def __init__(self, path=None, spool_dir=None, max_pending=None, uploads=None):
+        self.path = path or os.environ.get("QAJ_JOB_DB") or os.path.join(tempfile.gettempdir(), "qaj-jobs.sqlite")
+        self.uploads = uploads or UploadStore(spill_dir=spool_dir)
+        self.spool_dir = self.uploads.spill_dir
+        self.max_pending = int(os.environ.get("QAJ_MAX_PENDING_JOBS", "32")) if max_pending is None else max_pending
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Revisions saved before they expired (or recorded their worker)
+            # lack those columns; they are only a cache
+            if not {"updated", "worker"} <= {row[1] for row in conn.execute("PRAGMA table_info(revisions)")}:
+                conn.execute("DROP TABLE IF EXISTS revisions")
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "upload_bytes" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN upload_bytes INTEGER NOT NULL DEFAULT 0")
+            if "revision_key" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN revision_key TEXT")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def submit(self, kind, payload, name=None, data=None):
+        """
+        Queue a job and return its id. data (bytes or a binary file object)
+        is passed to the worker as payload["data"] (bytes) when the upload
+        store keeps it in memory, else spilled to disk as payload["path"].
+        Raises QueueFull when max_pending jobs are already waiting or
+        running, UploadTooLarge when data exceeds the upload limit.
+        """
+        conn = self._connect()
+        pending = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", ACTIVE
+        ).fetchone()[0]
+        if pending >= self.max_pending:
+            raise QueueFull(f"{pending} jobs are already queued; please try again in a moment.")
+        job_id = uuid.uuid4().hex
+        spool_path = None
+        upload_bytes = 0
+        if data is not None:
+            in_memory = conn.execute(
+                "SELECT COALESCE(SUM(upload_bytes), 0) FROM jobs WHERE status IN (?, ?)", ACTIVE
+            ).fetchone()[0]
+            upload = self.uploads.store(name or "", data, in_memory)
+            if upload.path is None:
+                payload["data"] = upload.source
+                upload_bytes = upload.size
+            else:
+                spool_path = payload["path"] = upload.path
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, payload, spool_path, upload_bytes, revision_key, submitted) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, pickle.dumps(payload, pickle.HIGHEST_PROTOCOL), spool_path, upload_bytes,
+             payload.get("revision_key"), time.time()),
+        )
+        return job_id
+
+    def claim(self, worker):
+        """
+        Take the oldest queued job this worker may run: (id, kind, payload),
+        or None. A revision of a manuscript goes to the worker that checked
+        the previous one, unless it has waited AFFINITY_SECONDS.
+        """
+        now = time.time()
+        row = self._connect().execute(
+            "UPDATE jobs SET status = ?, started = ?, worker = ? WHERE id = ("
+            "SELECT j.id FROM jobs j LEFT JOIN revisions r ON r.key = j.revision_key "
+            "WHERE j.status = ? AND (r.worker IS NULL OR r.worker = ? OR j.submitted < ?) "
+            "ORDER BY j.submitted LIMIT 1"
+            ") AND status = ? RETURNING id, kind, payload",
+            (RUNNING, now, worker, QUEUED, worker, now - AFFINITY_SECONDS, QUEUED),
+        ).fetchone()
+        return (row[0], row[1], pickle.loads(row[2])) if row else None
+
+    def add_progress(self, job_id, step):
+        """Record a finished step; returns True when the job should stop (cancelled)."""
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET progress = json_insert(progress, '$[#]', json(?)) WHERE id = ?",
+            (json.dumps(step), job_id),
+        )
+        return bool(conn.execute("SELECT cancel FROM jobs WHERE id = ?", (job_id,)).fetchone()[0])
+
+    def _close(self, job_id, status, result=None, error=None):
+        conn = self._connect()
+        row = conn.execute("SELECT spool_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+            (status, None if result is None else pickle.dumps(result, pickle.HIGHEST_PROTOCOL), error,
+             time.time(), job_id),
+        )
+        if row and row[0]:
+            self.uploads.discard(row[0])
+        self.prune()
+
+    def finish(self, job_id, result):
+        self._close(job_id, DONE, result=result)
+
+    def fail(self, job_id, error):
+        self._close(job_id, FAILED, error=error)
+
+    def cancelled(self, job_id):
+        self._close(job_id, CANCELLED)
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask its worker to stop at the next step."""
+        conn = self._connect()
+        conn.execute("UPDATE jobs SET cancel = 1 WHERE id = ? AND status IN (?, ?)", (job_id,) + ACTIVE)
+        claimed = conn.execute(
+            "UPDATE jobs SET status = ? WHERE id = ? AND status = ? RETURNING id", (CANCELLED, job_id, QUEUED)
+        ).fetchone()
+        if claimed:
+            self.cancelled(job_id)
+
+    def status(self, job_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id, kind, status, progress, error, submitted, started, finished FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        ahead = 0
+        if row[2] == QUEUED:
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND submitted < ?", (QUEUED, row[5])
+            ).fetchone()[0]
+        return Job(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5], row[6], row[7], ahead)
+
+    def result(self, job_id):
+        row = self._connect().execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return pickle.loads(row[0]) if row and row[0] is not None else None
+
+    def recover(self, workers=None):
+        """
+        Requeue jobs left running by workers that died: the given worker
+        pids, or (when workers is None, e.g. at start-up) every worker that
+        is no longer alive. Jobs of live workers, such as those started with
+        `python job_service.py` or by another app process, keep running.
+        """
+        conn = self._connect()
+        if workers is None:
+            running = conn.execute("SELECT DISTINCT worker FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            workers = [worker for (worker,) in running if not _alive(worker)]
+        for worker in workers:
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = '[]' WHERE status = ? AND worker = ?",
+                (QUEUED, RUNNING, worker),
+            )
+            conn.execute("UPDATE revisions SET worker = NULL WHERE worker = ?", (worker,))
+        self.prune()
+
+    def prune(self):
+        """Drop finished jobs (and their results) older than KEEP_SECONDS."""
+        self._connect().execute(
+            "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished < ?", ACTIVE + (time.time() - KEEP_SECONDS,)
+        )
+
+    def load_revision(self, key):
+        row = self._connect().execute("SELECT issues FROM revisions WHERE key = ?", (key,)).fetchone()
+        return Counter({(section, issue): count for section, issue, count in json.loads(row[0])}) if row else None
+
+    def save_revision(self, key, issues, worker=None):
+        """Store a revision's issues; worker is the process that holds its incremental checker."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO revisions (key, issues, updated, worker) VALUES (?, ?, ?, ?)",
+            (key, json.dumps([[section, issue, count] for (section, issue), count in issues.items()]), now, worker),
+        )
+        conn.execute("DELETE FROM revisions WHERE updated < ?", (now - REVISION_KEEP_SECONDS,))
+
+def issue_count(value):
+    """Number of issues in a task result, for progress messages."""
+    if isinstance(value, dict):
+        return sum(issue_count(v) for k, v in value.items() if k not in NON_ISSUE_KEYS)
+    if isinstance(value, list):
+        return len(value)
+    return 0
+
+# --- worker side ----------------------------------------------------------
+
+def warm_up():
+    """
+    Import the analysis modules (fitz, python-docx, reportlab, lxml) and
+    compile the default style profile before the first job arrives.
+    QAJ_WARM_UP=0 skips this, e.g. to get new workers polling sooner.
+    """
+    if os.environ.get("QAJ_WARM_UP") == "0":
+        return
+    import citation_formatter  # noqa: F401
+    import report_generator  # noqa: F401
+    from pipeline import warm_up as warm_up_pipeline
+    warm_up_pipeline()
+
+def _analyze(queue, job_id, payload, checkers):
+    from citation_corpus import file_digest, get_corpus, submission_key
+    from incremental import IncrementalChecker
+    from pipeline import collect_entry, iter_analysis
+
+    source = BytesIO(payload["data"]) if "data" in payload else payload["path"]
+    key = payload.get("revision_key")
+    if key is None:
+        stream = iter_analysis(source, name=payload["name"], profile=payload.get("style"))
+    else:
+        checker = checkers.pop(key, None) or IncrementalChecker()
+        checkers[key] = checker
+        while len(checkers) > MAX_REVISION_CHECKERS:
+            checkers.popitem(last=False)
+        # Another worker may have checked the previous revision
+        checker.previous_issues = queue.load_revision(key)
+        stream = checker.iter_check(source, name=payload["name"], profile=payload.get("style"))
+
+    results = []
+    # QAJ_TRACE_ALLOCATIONS / QAJ_PROFILE turn on tracemalloc / cProfile capture
+    with recording(
+        allocations=os.environ.get("QAJ_TRACE_ALLOCATIONS") == "1",
+        profile=os.environ.get("QAJ_PROFILE") == "1"
+    ) as recorder:
+        for step, value in stream:
+            results.append((step, value))
+            if queue.add_progress(job_id, {"step": step, "issues": issue_count(value)}):
+                stream.close()
+                return None
+    if key is not None:
+        queue.save_revision(key, checker.previous_issues, os.getpid())
+    entry = collect_entry(results)
+    entry["timings"] = recorder.as_dict()
+    corpus = get_corpus()
+    if corpus is not None:
+        digest = hashlib.sha256(payload["data"]).hexdigest() if "data" in payload else file_digest(payload["path"])
+        # A new revision replaces the previous one rather than "reusing" its references
+        corpus.add_submission(
+            submission_key(digest, key), payload["name"], entry["ref_report"].get("Extracted References", []),
+            author=entry["author"], style=payload.get("style"),
+        )
+    return entry
+
+def _report(queue, job_id, payload, checkers):
+    from citation_formatter import correct_references
+    from report_generator import generate_pdf_report
+
+    ref_report = payload["ref_report"]
+    with recording() as recorder:
+        corrected = correct_references(ref_report.get("Extracted References", []))
+        pdf = generate_pdf_report(ref_report, corrected, payload["reviews"], payload["formatting_results"]).getvalue()
+    return {"pdf": pdf, "timings": recorder.as_dict()}
+
+JOB_KINDS = {"analyze": _analyze, "report": _report}
+
+def run_job(queue, job_id, kind, payload, checkers):
+    try:
+        result = JOB_KINDS[kind](queue, job_id, payload, checkers)
+    except Exception as e:
+        queue.fail(job_id, f"{type(e).__name__}: {e}")
+        return
+    if result is None:
+        queue.cancelled(job_id)
+    else:
+        queue.finish(job_id, result)
+
+def worker_main(db_path=None, spool_dir=None, parent=None):
+    """Serve jobs until killed, or until the process that started this worker exits."""
+    warm_up()
+    queue = JobQueue(db_path, spool_dir)
+    checkers = OrderedDict()
+    while parent is None or os.getppid() == parent:
+        job = queue.claim(os.getpid())
+        if job is None:
+            time.sleep(POLL_SECONDS)
+            continue
+        run_job(queue, *job, checkers)
+
+class JobService:
+    """
+    A JobQueue plus its worker processes, restarted if they die. Workers are
+    started as `python job_service.py --worker` rather than with
+    multiprocessing, which would re-run the Streamlit script (Streamlit
+    installs it as __main__) in every worker.
+    """
+
+    def __init__(self, db_path=None, workers=None, spool_dir=None, max_pending=None):
+        self.queue = JobQueue(db_path, spool_dir, max_pending)
+        self.queue.recover()
+        self.workers = int(os.environ.get("QAJ_WORKERS", DEFAULT_WORKERS)) if workers is None else workers
+        self._processes = []
+        self._lock = threading.Lock()
+        self.ensure_workers()
+
+    def ensure_workers(self):
+        with self._lock:
+            dead = [process for process in self._processes if process.poll() is not None]
+            if dead:
+                self.queue.recover([process.pid for process in dead])
+                self._processes = [process for process in self._processes if process not in dead]
+            while len(self._processes) < self.workers:
+                self._processes.append(subprocess.Popen([
+                    sys.executable, os.path.abspath(__file__), "--worker",
+                    "--db", self.queue.path, "--spool-dir", self.queue.spool_dir, "--parent", str(os.getpid()),
+                ]))
+
+    def submit_analysis(self, name, data, style=None, revision_key=None):
+        """Queue a manuscript (bytes or binary file object) for analysis."""
+        self.ensure_workers()
+        payload = {"name": name, "style": style, "revision_key": revision_key}
+        return self.queue.submit("analyze", payload, name, data)
+
+    def submit_report(self, ref_report, reviews, formatting_results):
+        """Queue rendering of the PDF report; the result is {"pdf": bytes, "timings": ...}."""
+        self.ensure_workers()
+        payload = {
+            "ref_report": ref_report,
+            "reviews": reviews,
+            "formatting_results": formatting_results,
+        }
+        return self.queue.submit("report", payload)
+
+    def status(self, job_id):
+        return self.queue.status(job_id)
+
+    def result(self, job_id):
+        return self.queue.result(job_id)
+
+    def cancel(self, job_id):
+        self.queue.cancel(job_id)
+
+    def stop(self, timeout=5):
+        # A job interrupted here is requeued by the next JobService's recover()
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes = []
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run analysis workers for the local job queue.")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS, help="number of worker processes")
+    parser.add_argument("--db", default=None, help="job database (default: QAJ_JOB_DB)")
+    parser.add_argument("--spool-dir", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help="run a single worker in this process")
+    parser.add_argument("--parent", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker_main(args.db, args.spool_dir, args.parent)
+        return 0
+    service = JobService(args.db, args.workers, args.spool_dir)
+    print(f"{service.workers} worker(s) serving {service.queue.path}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(5)
+            service.ensure_workers()
+    except KeyboardInterrupt:
+        service.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,234 @@
-def generate_review(text, model_name="mistral"):
-    return """Reviewer A: This is a placeholder review.
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import httpx
+
+PLACEHOLDER_REVIEW = """Reviewer A: This is a placeholder review.
 Reviewer B: Since Streamlit Cloud does not support local models, Ollama cannot run here.
 Reviewer C: Please run this app locally with Ollama for full AI-generated feedback."""
+
+# Set OLLAMA_HOST (e.g. http://localhost:11434) to enable the local backend.
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "")
+MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "4"))
+CHUNK_CHARS = 6000
+REQUEST_TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+# What a failing or unreachable backend raises out of stream_review.
+BACKEND_ERRORS = (httpx.HTTPError, OSError, RuntimeError)
+
+REVIEW_PROMPT = """You are an expert peer reviewer for an academic journal.
+Review the following part of a submitted manuscript. Point out unclear
+claims, methodological weaknesses, missing citations and language problems,
+and suggest concrete improvements. Be concise.
+
+--- MANUSCRIPT SECTION ---
+{section}
+"""
+
+HEADING_WORDS = ("ABSTRACT", "INTRODUCTION", "LITERATURE REVIEW", "METHOD", "RESULT",
+                 "DISCUSSION", "CONCLUSION", "REFERENCES")
+
+def split_sections(text, max_chars=CHUNK_CHARS):
+    """
+    Split a manuscript into section-sized chunks: a new chunk starts at each
+    heading line, and long sections are cut at paragraph boundaries so no
+    chunk exceeds max_chars (unless a single paragraph does).
+    """
+    sections, current = [], []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        is_heading = 0 < len(stripped) < 60 and stripped.upper().lstrip("0123456789. ").startswith(HEADING_WORDS)
+        if is_heading and any(p.strip() for p in current):
+            sections.append(current)
+            current = []
+        current.append(line)
+    if any(p.strip() for p in current):
+        sections.append(current)
+
+    chunks = []
+    for lines in sections:
+        chunk, size = [], 0
+        for line in lines:
+            if chunk and size + len(line) + 1 > max_chars:
+                chunks.append("\n".join(chunk))
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            chunks.append("\n".join(chunk))
+    return chunks
+
+class ReviewCache:
+    """
+    Content-addressed store of model responses: the key is the SHA-256 of
+    the model name and the full prompt, so a section that was already
+    reviewed is never sent again. The most recent max_entries responses
+    are kept in memory; all of them are persisted under cache_dir if given.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _remember(self, key, response):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def key(model, prompt):
+        return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+    def get(self, model, prompt):
+        key = self.key(model, prompt)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    response = json.load(f)["response"]
+                with self._lock:
+                    self._remember(key, response)
+                return response
+        return None
+
+    def put(self, model, prompt, response):
+        key = self.key(model, prompt)
+        with self._lock:
+            self._remember(key, response)
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"model": model, "prompt": prompt, "response": response}, f)
+            os.replace(path + ".tmp", path)
+
+review_cache = ReviewCache(
+    os.environ.get("QAJ_REVIEW_CACHE_DIR") or None,
+    max_entries=int(os.environ.get("QAJ_REVIEW_CACHE_SIZE", "256"))
+)
+
+async def _stream_generate(client, model, prompt):
+    payload = {"model": model, "prompt": prompt, "stream": True}
+    async with client.stream("POST", "/api/generate", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                raise RuntimeError(f"the backend sent a line that is not JSON: {line[:200]!r}") from None
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                break
+
+async def review_sections(chunks, model_name="mistral", on_token=None, on_done=None, host=None,
+                          max_concurrency=MAX_CONCURRENCY, cache=review_cache):
+    """
+    Review every chunk concurrently (at most max_concurrency requests in
+    flight over one pooled client). on_token(index, text) is called for each
+    streamed token, on_done(index) when a chunk's review is complete; cached
+    sections are delivered as a single token. Returns the review of each
+    chunk, in order.
+    """
+    on_token = on_token or (lambda index, token: None)
+    on_done = on_done or (lambda index: None)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+
+    async with httpx.AsyncClient(base_url=host or OLLAMA_HOST, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        async def review(index, chunk):
+            prompt = REVIEW_PROMPT.format(section=chunk)
+            cached = cache.get(model_name, prompt)
+            if cached is not None:
+                on_token(index, cached)
+                on_done(index)
+                return cached
+            async with semaphore:
+                parts = []
+                async for token in _stream_generate(client, model_name, prompt):
+                    parts.append(token)
+                    on_token(index, token)
+            response = "".join(parts)
+            cache.put(model_name, prompt, response)
+            on_done(index)
+            return response
+
+        return await asyncio.gather(*(review(i, chunk) for i, chunk in enumerate(chunks)))
+
+def _section_header(index, total):
+    return f"\n\n**Section {index + 1}/{total}**\n\n" if total > 1 else ""
+
+def stream_review(text, model_name="mistral", host=None):
+    """
+    Yield the review as it is generated, for st.write_stream. Sections are
+    reviewed concurrently in a background event loop; tokens of the earliest
+    unfinished section are yielded live and later sections are buffered
+    until their turn, so the output reads in manuscript order.
+    """
+    host = host or OLLAMA_HOST
+    if not host:
+        yield PLACEHOLDER_REVIEW
+        return
+
+    chunks = split_sections(text)
+    events = queue.Queue()
+    finished = object()
+
+    def run():
+        try:
+            asyncio.run(review_sections(
+                chunks, model_name, host=host,
+                on_token=lambda index, token: events.put((index, token)),
+                on_done=lambda index: events.put((index, finished)),
+            ))
+        except Exception as e:
+            events.put((None, e))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    buffers = [[] for _ in chunks]
+    complete = [False] * len(chunks)
+    current = 0
+    if chunks:
+        yield _section_header(0, len(chunks))
+    while current < len(chunks):
+        index, token = events.get()
+        if index is None:
+            raise token
+        if token is finished:
+            complete[index] = True
+            # Move on past every section that is already complete.
+            while current < len(chunks) and complete[current]:
+                current += 1
+                if current < len(chunks):
+                    yield _section_header(current, len(chunks))
+                    if buffers[current]:
+                        yield "".join(buffers[current])
+                        buffers[current] = []
+        elif index == current:
+            yield token
+        else:
+            buffers[index].append(token)
+
+def generate_review(text, model_name="mistral"):
+    """Full review as one string; falls back to the placeholder when no local backend is reachable."""
+    try:
+        return "".join(stream_review(text, model_name)).strip()
+    except BACKEND_ERRORS:
+        return PLACEHOLDER_REVIEW
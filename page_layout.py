@@ -0,0 +1,187 @@
+"""
+Page geometry of a manuscript: page size, margins, header/footer distances
+and columns per DOCX section (from the w:sectPr elements of an already
+parsed python-docx Document) or per PDF page (from PyMuPDF), checked
+against the page layout of a style profile. All lengths are EMU
+(python-docx Length).
+"""
+from collections import namedtuple
+
+from docx.enum.section import WD_ORIENT
+from docx.oxml.ns import qn
+from docx.shared import Emu, Inches, Mm, Pt
+
+from citation_index import format_intervals
+from file_parser import open_pdf
+from style_profile import ProfileError, length, resolve_profile
+
+SectionGeometry = namedtuple("SectionGeometry", [
+    "number", "width", "height", "top", "right", "bottom", "left",
+    "header", "footer", "gutter", "columns", "landscape",
+])
+
+# Page sizes a profile's "page.sizes" can name (portrait width, height).
+PAGE_SIZES = {
+    "A4": (Mm(210), Mm(297)),
+    "A5": (Mm(148), Mm(210)),
+    "B5": (Mm(176), Mm(250)),
+    "US Letter": (Inches(8.5), Inches(11)),
+    "US Legal": (Inches(8.5), Inches(14)),
+}
+
+# A profile's "page" section compiled to EMU.
+LayoutSpec = namedtuple("LayoutSpec", ["sizes", "size_tolerance", "margin", "margin_tolerance", "columns"])
+
+MARGIN_SIDES = ("top", "right", "bottom", "left")
+
+def inches(length):
+    return f"{Emu(length).inches:.2f}".rstrip("0").rstrip(".") + " in"
+
+def _columns(sect_pr):
+    cols = sect_pr.find(qn("w:cols"))
+    num = cols.get(qn("w:num")) if cols is not None else None
+    return int(num) if num else 1
+
+def compile_layout(profile):
+    page = profile.section("page")
+    unknown = [name for name in page.get("sizes", ["A4"]) if name not in PAGE_SIZES]
+    if unknown:
+        raise ProfileError(f"Unknown page size(s) {', '.join(unknown)} (known: {', '.join(PAGE_SIZES)})")
+    return LayoutSpec(
+        {name: PAGE_SIZES[name] for name in page.get("sizes", ["A4"])},
+        length(page, "size_tolerance", Mm(2)),
+        length(page, "margin", Inches(1)),
+        length(page, "margin_tolerance", Inches(0.05)),
+        page.get("columns", 1),
+    )
+
+def layout_spec(profile=None):
+    return resolve_profile(profile).compiled("layout", compile_layout)
+
+def docx_layouts(doc):
+    """One SectionGeometry per section; unset values are None."""
+    layouts = []
+    for number, section in enumerate(doc.sections, 1):
+        layouts.append(SectionGeometry(
+            number,
+            section.page_width, section.page_height,
+            section.top_margin, section.right_margin, section.bottom_margin, section.left_margin,
+            section.header_distance, section.footer_distance, section.gutter,
+            _columns(section._sectPr),
+            section.orientation == WD_ORIENT.LANDSCAPE,
+        ))
+    return layouts
+
+def _body_box(page, rect, spec):
+    """
+    Bounding box of the page's content, ignoring blocks that sit entirely
+    inside the expected top/bottom margin (running heads, page numbers).
+    """
+    top_band = Emu(spec.margin - spec.margin_tolerance).pt
+    bottom_band = rect.height - top_band
+    box = None
+    for x0, y0, x1, y1, *_ in page.get_text("blocks"):
+        if y1 <= top_band or y0 >= bottom_band:
+            continue
+        box = (x0, y0, x1, y1) if box is None else (
+            min(box[0], x0), min(box[1], y0), max(box[2], x1), max(box[3], y1))
+    return box
+
+def pdf_layouts(source, spec):
+    """
+    One SectionGeometry per non-empty page. A PDF has no margin settings, so the
+    margins are the distances from the page edges to the body text.
+    """
+    layouts = []
+    with open_pdf(source) as pdf:
+        for number, page in enumerate(pdf, 1):
+            rect = page.rect
+            box = _body_box(page, rect, spec)
+            if box is None:
+                continue
+            x0, y0, x1, y1 = box
+            layouts.append(SectionGeometry(
+                number,
+                Pt(rect.width), Pt(rect.height),
+                Pt(y0), Pt(rect.width - x1), Pt(rect.height - y1), Pt(x0),
+                None, None, None, None,
+                rect.width > rect.height,
+            ))
+    return layouts
+
+def page_size_name(width, height, spec):
+    for name, (expected_width, expected_height) in spec.sizes.items():
+        if (abs(width - expected_width) <= spec.size_tolerance
+                and abs(height - expected_height) <= spec.size_tolerance):
+            return name
+    return None
+
+def layout_issues(layout, spec, measured=False):
+    """
+    Issues for one section/page. measured margins (PDF) are only lower
+    bounds of the real margins, so only text inside the margin is reported.
+    """
+    issues = []
+    if layout.landscape:
+        issues.append("Page orientation is landscape (expected portrait).")
+    if layout.width is not None and layout.height is not None:
+        width, height = sorted((layout.width, layout.height))
+        if page_size_name(width, height, spec) is None:
+            issues.append(
+                f"Page size is {inches(width)} × {inches(height)} "
+                f"(expected {' or '.join(spec.sizes)})."
+            )
+    for side in MARGIN_SIDES:
+        margin = getattr(layout, side)
+        if margin is None:
+            if not measured:
+                issues.append(f"{side.capitalize()} margin is not set.")
+        elif measured:
+            if margin < spec.margin - spec.margin_tolerance:
+                issues.append(
+                    f"Text extends into the {side} margin "
+                    f"({inches(margin)} from the edge, expected {inches(spec.margin)})."
+                )
+        elif abs(abs(margin) - spec.margin) > spec.margin_tolerance:
+            issues.append(f"{side.capitalize()} margin is {inches(abs(margin))} (expected {inches(spec.margin)}).")
+    for name, distance, margin in (("Header", layout.header, layout.top), ("Footer", layout.footer, layout.bottom)):
+        if distance is not None and margin is not None and distance >= abs(margin):
+            issues.append(f"{name} distance {inches(distance)} reaches into the body text (margin {inches(abs(margin))}).")
+    if layout.gutter:
+        issues.append(f"Gutter of {inches(layout.gutter)} is set (expected none).")
+    if layout.columns is not None and layout.columns != spec.columns:
+        issues.append(f"Text is set in {layout.columns} columns (expected {spec.columns}).")
+    return issues
+
+def _runs(numbers):
+    runs = []
+    for n in numbers:
+        if runs and n == runs[-1][1] + 1:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    return runs
+
+def check_layouts(layouts, unit, spec, measured=False):
+    """
+    Issues for every section/page, each distinct issue listed once with the
+    sections/pages it applies to (when there is more than one).
+    """
+    where = {}
+    for layout in layouts:
+        for issue in layout_issues(layout, spec, measured):
+            where.setdefault(issue, []).append(layout.number)
+    if len(layouts) <= 1:
+        return list(where)
+    return [
+        f"{issue.rstrip('.')} ({unit}{'s' if len(numbers) > 1 else ''} "
+        f"{', '.join(format_intervals(_runs(numbers)))})."
+        for issue, numbers in where.items()
+    ]
+
+def check_docx_layout(doc, profile=None):
+    return check_layouts(docx_layouts(doc), "section", layout_spec(profile))
+
+def check_pdf_layout(source, profile=None):
+    spec = layout_spec(profile)
+    return check_layouts(pdf_layouts(source, spec), "page", spec, measured=True)
@@ -0,0 +1,195 @@
+import contextvars
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from docx import Document
+from file_parser import docx_text, extract_text_from_pdf
+from profiling import current_recorder
+from page_layout import check_pdf_layout, layout_spec
+from ref_checker import check_references
+from format_checker import (
+    MARGIN_SECTION,
+    PARAGRAPH_RULES,
+    check_headings,
+    check_margins,
+    check_tables_figures,
+    paragraph_records,
+    rule_table,
+    run_rules,
+)
+from doi_index import DoiIndex
+from reference import Reference
+from report_sections import FORMATTING_SECTIONS, formatting_results  # noqa: F401 (re-exported)
+from section_index import SectionIndex
+from style_profile import resolve_profile
+
+# A unit of work in the analysis graph: fn(*values of inputs) produces the
+# value called name, which later tasks can list among their inputs.
+Task = namedtuple("Task", ["name", "fn", "inputs"])
+
+MAX_WORKERS = 4
+
+# Task results that are copied into the analysis entry as-is.
+ENTRY_KEYS = ("text", "author", "ref_report", "heading_issues", "table_issues", "revision")
+# Task results that are sections of the entry's "docx_results".
+DOCX_SECTION_KEYS = set(PARAGRAPH_RULES) | {MARGIN_SECTION}
+
+_doi_index = None
+
+def warm_up(profiles=(None,)):
+    """
+    Load PyMuPDF (file_parser imports it on first use) and compile the rule
+    and page-layout tables of each profile, so the first manuscript a
+    worker checks does not pay for them.
+    """
+    import fitz  # noqa: F401
+    for profile in profiles:
+        profile = resolve_profile(profile)
+        rule_table(profile)
+        layout_spec(profile)
+
+def get_doi_index():
+    """The offline DOI index named by QAJ_DOI_INDEX, opened once per process."""
+    global _doi_index
+    path = os.environ.get("QAJ_DOI_INDEX")
+    if _doi_index is None and path and os.path.exists(path):
+        _doi_index = DoiIndex(path)
+    return _doi_index
+
+def extract_author_name(text):
+    match = re.search(r"\n(.*?)\n.*?\n", text)
+    if match:
+        raw = match.group(1)
+        clean = re.sub(r"[\d\*]+", "", raw)
+        return re.sub(r"\s{2,}", " ", clean).strip(",; \n")
+    return ""
+
+def run_tasks(tasks, initial, max_workers=MAX_WORKERS):
+    """
+    Run a task graph on a thread pool, starting each task as soon as all of
+    its inputs exist, and yield (name, value) as tasks finish. initial
+    holds the values that are available up front (e.g. {"source": ...}).
+
+    While a recording() captures a profile or allocations, tasks run one
+    at a time on the calling thread instead: cProfile only sees that
+    thread, and per-stage allocations would include other threads' stages.
+    """
+    recorder = current_recorder()
+    if recorder is not None and (recorder.profile or recorder.allocations):
+        yield from _run_serially(tasks, initial)
+    else:
+        yield from _run_pooled(tasks, initial, max_workers)
+
+def _run_serially(tasks, initial):
+    values = dict(initial)
+    pending = list(tasks)
+    while pending:
+        ready = [task for task in pending if all(key in values for key in task.inputs)]
+        if not ready:
+            break
+        for task in ready:
+            pending.remove(task)
+            values[task.name] = task.fn(*[values[key] for key in task.inputs])
+            yield task.name, values[task.name]
+    if pending:
+        raise ValueError(f"Tasks with unsatisfiable inputs: {', '.join(task.name for task in pending)}")
+
+def _run_pooled(tasks, initial, max_workers):
+    values = dict(initial)
+    pending = {task.name: task for task in tasks}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        def launch():
+            for name, task in list(pending.items()):
+                if all(key in values for key in task.inputs):
+                    del pending[name]
+                    # Copy the context so stage timings reach the caller's recorder
+                    context = contextvars.copy_context()
+                    future = pool.submit(context.run, task.fn, *[values[key] for key in task.inputs])
+                    running[future] = name
+
+        launch()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                values[name] = future.result()
+                yield name, values[name]
+            launch()
+    if pending:
+        raise ValueError(f"Tasks with unsatisfiable inputs: {', '.join(pending)}")
+
+def _check_references(text, author, sections, **options):
+    return check_references(text, author, sections=sections, **options)
+
+def _run_section(section, profile, records):
+    return run_rules(records, [section], profile=profile)[section]
+
+def docx_tasks(profile):
+    """Parse once, then every formatting rule as its own task over the shared records."""
+    tasks = [
+        Task("document", Document, ("source",)),
+        Task("text", docx_text, ("document",)),
+        Task("records", partial(paragraph_records, profile=profile), ("document",)),
+        Task(MARGIN_SECTION, partial(check_margins, profile=profile), ("document",)),
+    ]
+    tasks.extend(
+        Task(section, partial(_run_section, section, profile), ("records",)) for section in PARAGRAPH_RULES
+    )
+    return tasks
+
+def pdf_tasks(profile):
+    return [
+        Task("text", extract_text_from_pdf, ("source",)),
+        Task(MARGIN_SECTION, partial(check_pdf_layout, profile=profile), ("source",)),
+    ]
+
+def text_tasks(profile, make_reference=Reference, doi_index=None):
+    """Checks that only need the extracted text."""
+    return [
+        Task("sections", SectionIndex, ("text",)),
+        Task("author", extract_author_name, ("text",)),
+        Task("ref_report", partial(_check_references, make_reference=make_reference, doi_index=doi_index,
+                                   profile=profile),
+             ("text", "author", "sections")),
+        Task("heading_issues", check_headings, ("text", "sections")),
+        Task("table_issues", check_tables_figures, ("text", "sections")),
+    ]
+
+def is_pdf(name):
+    return os.fspath(name).lower().endswith(".pdf")
+
+def manuscript_tasks(name, profile):
+    file_tasks = pdf_tasks(profile) if is_pdf(name) else docx_tasks(profile)
+    return file_tasks + text_tasks(profile, doi_index=get_doi_index())
+
+def collect_entry(results):
+    """Fold a stream of (name, value) task results into an analysis entry."""
+    entry = {"docx_results": {}}
+    for name, value in results:
+        if name in ENTRY_KEYS:
+            entry[name] = value
+        elif name in DOCX_SECTION_KEYS:
+            entry["docx_results"][name] = value
+        elif name == "docx_results":
+            entry["docx_results"].update(value)
+    return entry
+
+def iter_analysis(source, max_workers=MAX_WORKERS, name=None, profile=None):
+    """
+    Yield (name, value) for each check of the manuscript as it finishes.
+    source is a path or an in-memory binary buffer; name (default: source)
+    tells PDF from DOCX. profile is the journal style profile (a
+    style_profile name or StyleProfile; default QAJ).
+    """
+    tasks = manuscript_tasks(source if name is None else name, resolve_profile(profile))
+    return run_tasks(tasks, {"source": source}, max_workers)
+
+def analyze_file(source, max_workers=MAX_WORKERS, name=None, profile=None):
+    """
+    Run every check on a PDF or DOCX manuscript (a path or a buffer, see
+    iter_analysis). DOCX-only formatting results are empty for PDFs.
+    """
+    return collect_entry(iter_analysis(source, max_workers, name, profile))
@@ -0,0 +1,111 @@
+import cProfile
+import contextvars
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# The recorder for the document currently being analyzed. Stages outside a
+# recording() block cost one ContextVar lookup and are otherwise free.
+_current = contextvars.ContextVar("stage_recorder", default=None)
+
+class StageRecorder:
+    """Wall time, call count and (optionally) net allocations per stage."""
+
+    def __init__(self, allocations=False, profile=False):
+        self.allocations = allocations
+        self.profile = profile
+        self.stages = {}
+        self.profile_text = None
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, allocated=None):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            if allocated is not None:
+                stage["allocated_kb"] = stage.get("allocated_kb", 0.0) + allocated / 1024
+
+    def as_dict(self):
+        return {
+            "stages": {
+                name: {key: round(value, 4) if isinstance(value, float) else value for key, value in stage.items()}
+                for name, stage in self.stages.items()
+            },
+            "profile": self.profile_text,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+def timing_rows(timings):
+    """Stages of a StageRecorder.as_dict() sorted by total time, for tables."""
+    return [
+        {"stage": name, **values}
+        for name, values in sorted(timings["stages"].items(), key=lambda item: -item[1]["seconds"])
+    ]
+
+def current_recorder():
+    return _current.get()
+
+@contextmanager
+def recording(allocations=False, profile=False, profile_limit=40):
+    """
+    Collect stage timings for everything run inside the block. With
+    allocations=True, tracemalloc tracks net allocations per stage; with
+    profile=True, a cProfile summary of the block is stored as text.
+    """
+    recorder = StageRecorder(allocations, profile)
+    token = _current.set(recorder)
+    started_tracing = allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(profile_limit)
+            recorder.profile_text = out.getvalue()
+        if started_tracing:
+            tracemalloc.stop()
+        _current.reset(token)
+
+@contextmanager
+def stage(name):
+    recorder = _current.get()
+    if recorder is None:
+        yield
+        return
+    tracing = recorder.allocations and tracemalloc.is_tracing()
+    before = tracemalloc.get_traced_memory()[0] if tracing else None
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        allocated = tracemalloc.get_traced_memory()[0] - before if tracing else None
+        recorder.add(name, seconds, allocated)
+
+def timed(name=None):
+    """Decorator form of stage(); the name defaults to module.function."""
+    def decorator(fn):
+        stage_name = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,45 +1,123 @@
-import re
 from collections import Counter
+from citation_index import CitationIndex, expand_intervals, format_intervals
+from doi_index import validate_references
+from profiling import stage, timed
+from reference import NUM_PERM, Reference, as_references
+from rule_registry import LINE
+from section_index import SectionIndex
+from style_profile import resolve_profile
 
-def extract_references(text):
-    match = re.search(r"(References|REFERENCES)[\s\n]+(.+)", text, re.DOTALL)
-    if match:
-        refs_section = match.group(2)
-        references = refs_section.strip().split("\n")
-        return [r.strip() for r in references if len(r.strip()) > 30]
+@timed()
+def extract_references(text, sections=None):
+    span = (sections or SectionIndex(text)).references_span()
+    if span:
+        # Scan the lines in place rather than copying the section out first
+        lines = (line.group().strip() for line in LINE.finditer(text, *span))
+        return [r for r in lines if len(r) > 30]
     return []
 
 def check_duplicates(refs):
-    return [item for item, count in Counter(refs).items() if count > 1]
+    return [item for item, count in Counter(str(r) for r in refs).items() if count > 1]
+
+def _lsh_rows(threshold):
+    # Most rows per band that still makes pairs at the threshold collide in
+    # some band with >= 95% probability; fewer rows means more candidates.
+    best = 1
+    for rows in range(1, NUM_PERM + 1):
+        if NUM_PERM % rows == 0 and 1 - (1 - threshold ** rows) ** (NUM_PERM // rows) >= 0.95:
+            best = rows
+    return best
+
+@timed()
+def find_near_duplicates(refs, threshold=0.8):
+    """
+    Cluster references that are probably the same work written differently.
+    Candidate pairs come from MinHash LSH buckets (no all-pairs comparison)
+    and are confirmed with the exact Jaccard similarity of their shingles.
+    Returns [{"references": [...], "positions": [...], "similarity": s}]
+    where positions are 1-based and s is the lowest confirmed similarity
+    inside the cluster. Clusters of byte-identical strings are left to
+    check_duplicates.
+    """
+    refs = as_references(refs)
+    shingles = [r.shingles for r in refs]
+    rows = _lsh_rows(threshold)
+    buckets = {}
+    for i, sig in enumerate(r.signature for r in refs):
+        for band in range(0, NUM_PERM, rows):
+            buckets.setdefault((band, tuple(sig[band:band + rows])), []).append(i)
+
+    parent = list(range(len(refs)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    edges = []
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                # Pairs already joined through other edges need no check
+                if pair in checked or find(pair[0]) == find(pair[1]):
+                    continue
+                checked.add(pair)
+                a, b = shingles[pair[0]], shingles[pair[1]]
+                similarity = len(a & b) / len(a | b)
+                if similarity >= threshold:
+                    edges.append((pair, similarity))
+                    parent[find(pair[0])] = find(pair[1])
+
+    clusters = {}
+    for (i, j), similarity in edges:
+        cluster = clusters.setdefault(find(i), {"members": set(), "similarity": 1.0})
+        cluster["members"].update((i, j))
+        cluster["similarity"] = min(cluster["similarity"], similarity)
+
+    results = []
+    for cluster in clusters.values():
+        members = sorted(cluster["members"])
+        if len({refs[i].raw for i in members}) < 2:
+            continue
+        results.append({
+            "references": [refs[i].raw for i in members],
+            "positions": [i + 1 for i in members],
+            "similarity": round(cluster["similarity"], 3),
+        })
+    return sorted(results, key=lambda c: c["positions"][0])
 
 def check_self_citations(refs, author_name=""):
     if not author_name:
         return []
-    return [r for r in refs if author_name.lower() in r.lower()]
+    author_name = author_name.lower()
+    return [r.raw for r in as_references(refs) if author_name in r.lower]
+
+def check_journal_citations(refs, journal):
+    journal = journal.lower()
+    return [r.raw for r in as_references(refs) if journal in r.lower]
 
 def check_qubahan(refs):
-    return [r for r in refs if "qubahan academic journal" in r.lower()]
+    return check_journal_citations(refs, "Qubahan Academic Journal")
 
 def check_apa_format(refs):
     bold_violations = []
     doi_violations = []
-    for r in refs:
-        if not re.search(r"\*\*\(\d{4}\)\*\*", r):
-            bold_violations.append(r)
-        if "doi.org" in r.lower():
-            doi_violations.append(r)
+    for r in as_references(refs):
+        if "bold_year" not in r.scan:
+            bold_violations.append(r.raw)
+        if "doi_mention" in r.scan:
+            doi_violations.append(r.raw)
     return bold_violations, doi_violations
 
 def check_multiple_mentions(refs):
     author_counts = Counter()
     author_refs = {}
-    for ref in refs:
-        authors_part = ref.split("(")[0]
-        authors = re.split(r",| and |&", authors_part)
-        authors = [a.strip().lower() for a in authors if len(a.strip()) > 3 and not re.search(r"\d", a)]
-        for author in authors:
+    for ref in as_references(refs):
+        for author in ref.authors:
             author_counts[author] += 1
-            author_refs.setdefault(author, []).append(ref)
+            author_refs.setdefault(author, []).append(ref.raw)
     return {
         author: author_refs[author]
         for author, count in author_counts.items()
@@ -47,48 +125,59 @@ def check_multiple_mentions(refs):
     }
 
 def extract_intext_citations(text):
-    cited = set()
-    # 1) ranges like [3-5] or [3–5]
-    for m in re.finditer(r"\[(\d+)\s*[-–]\s*(\d+)\]", text):
-        start, end = map(int, m.groups())
-        cited.update(range(start, end + 1))
-    # remove those ranges so we don't parse them again
-    text_clean = re.sub(r"\[\d+\s*[-–]\s*\d+\]", "", text)
-    # 2) singles or comma-separated, e.g. [1], [1,2,5]
-    for m in re.finditer(r"\[(\d+(?:\s*,\s*\d+)*)\]", text_clean):
-        nums = re.split(r"\s*,\s*", m.group(1))
-        for num in nums:
-            if num.isdigit():
-                cited.add(int(num))
-    return cited
-
-def find_missing_intext_citations(text, refs):
-    cited = extract_intext_citations(text)
-    return [i for i in range(1, len(refs) + 1) if i not in cited]
-
-def check_references(text, author_name=""):
+    # Expands ranges into a set; prefer CitationIndex for large documents.
+    return set(expand_intervals(CitationIndex(text).cited))
+
+def find_missing_intext_citations(text, refs, index=None):
+    index = index or CitationIndex(text)
+    return expand_intervals(index.missing(len(refs)))
+
+@timed()
+def check_references(text, author_name="", near_duplicate_threshold=0.8, make_reference=Reference,
+                     doi_index=None, sections=None, profile=None):
+    """
+    make_reference(raw) builds the Reference for each extracted string; it
+    can return previously parsed objects to reuse their cached fields.
+    When a doi_index.DoiIndex is given, DOIs, years and titles are also
+    validated against it. sections is the text's SectionIndex, if already
+    built; in-text citations are only looked for before the reference list.
+    profile is the journal style profile (default QAJ), which names the
+    journal whose citations are capped (journal_citation_name) and the cap.
+    """
+    sections = sections or SectionIndex(text)
     results = {}
-    refs = extract_references(text)
+    refs = [make_reference(r) for r in extract_references(text, sections)]
     if not refs:
         return {"error": "No references found. Ensure your document contains a 'References' section."}
 
     results["Total References"] = len(refs)
     results["Duplicate References"] = check_duplicates(refs)
+    results["Near-Duplicate References"] = find_near_duplicates(refs, near_duplicate_threshold)
     results["Self-Citations"] = check_self_citations(refs, author_name)
 
-    # Qubahan citations: allow up to 2
-    qaj = check_qubahan(refs)
+    # Citations of the profile's journal (the report keys predate profiles): allow up to its limit
+    references = resolve_profile(profile).section("references")
+    limit = references.get("journal_citation_limit", 2)
+    qaj = check_journal_citations(refs, references.get("journal_citation_name", "Qubahan Academic Journal"))
     results["Qubahan Citations"] = qaj
-    if len(qaj) > 2:
-        results["Excess Qubahan Citations"] = qaj[2:]
+    if len(qaj) > limit:
+        results["Excess Qubahan Citations"] = qaj[limit:]
 
-    bold_v, doi_v = check_apa_format(refs)
-    results["APA Style Violations"] = {
-        "Missing Bold Year": bold_v,
-        "Contains DOI": doi_v
-    }
+    with stage("ref_checker.reference_rules"):
+        bold_v, doi_v = check_apa_format(refs)
+        results["APA Style Violations"] = {
+            "Missing Bold Year": bold_v,
+            "Contains DOI": doi_v
+        }
+        results["Highly Cited Authors (>4)"] = check_multiple_mentions(refs)
 
-    results["Highly Cited Authors (>4)"] = check_multiple_mentions(refs)
-    results["Missing In-Text Citations"] = find_missing_intext_citations(text, refs)
-    results["Extracted References"] = refs
+    with stage("ref_checker.citation_index"):
+        index = CitationIndex(text, sections.body_end())
+        results["Missing In-Text Citations"] = find_missing_intext_citations(text, refs, index)
+        results["Out-of-Order In-Text Citations"] = expand_intervals(index.out_of_order(), len(refs))
+        results["Citations Without Reference"] = format_intervals(index.beyond(len(refs)))
+    if doi_index is not None:
+        with stage("ref_checker.doi_validation"):
+            results.update(validate_references(refs, doi_index))
+    results["Extracted References"] = [r.raw for r in refs]
     return results
@@ -0,0 +1,175 @@
+import random
+import zlib
+from rule_registry import (
+    AUTHOR_SEPARATOR,
+    DIGIT,
+    DOI_PLAIN,
+    DOI_PREFIX,
+    DOI_URL,
+    NON_ALNUM,
+    REFERENCE_SCAN,
+    YEAR_IN_PARENS,
+)
+
+# MinHash parameters for near-duplicate detection. The seed is fixed so the
+# same reference list always produces the same clusters.
+SHINGLE_SIZE = 5
+NUM_PERM = 32
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240607)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+_UNSET = object()
+
+def normalize_reference(ref):
+    # "https://doi.org/10.1/X", "doi: 10.1/x" and "10.1/x" all become "10 1 x"
+    ref = DOI_PREFIX.sub(" ", ref.lower())
+    return NON_ALNUM.sub(" ", ref).strip()
+
+def minhash_signature(shingles):
+    hashes = [zlib.crc32(s.encode()) for s in shingles]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+class Reference:
+    """
+    One entry of a reference list. Only the raw string is stored up front;
+    every derived field is parsed on first access and cached, so each
+    reference is tokenized once no matter how many checks read it.
+    Compares and hashes like its raw string; str() returns it unchanged.
+    """
+
+    __slots__ = (
+        "raw", "_lower", "_authors_part", "_authors", "_year_match", "_title", "_venue",
+        "_doi_text", "_doi", "_normalized", "_scan", "_shingles", "_signature",
+    )
+
+    def __init__(self, raw):
+        self.raw = raw
+        for name in self.__slots__[1:]:
+            setattr(self, name, _UNSET)
+
+    @classmethod
+    def coerce(cls, ref):
+        return ref if isinstance(ref, cls) else cls(ref)
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"Reference({self.raw!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, Reference):
+            return self.raw == other.raw
+        return self.raw == other
+
+    def __hash__(self):
+        return hash(self.raw)
+
+    @property
+    def lower(self):
+        if self._lower is _UNSET:
+            self._lower = self.raw.lower()
+        return self._lower
+
+    @property
+    def authors_part(self):
+        if self._authors_part is _UNSET:
+            self._authors_part = self.raw.split("(")[0]
+        return self._authors_part
+
+    @property
+    def authors(self):
+        if self._authors is _UNSET:
+            self._authors = [
+                a.strip().lower() for a in AUTHOR_SEPARATOR.split(self.authors_part)
+                if len(a.strip()) > 3 and not DIGIT.search(a)
+            ]
+        return self._authors
+
+    @property
+    def _year(self):
+        if self._year_match is _UNSET:
+            self._year_match = YEAR_IN_PARENS.search(self.raw)
+        return self._year_match
+
+    @property
+    def year(self):
+        return int(self._year.group(1)) if self._year else None
+
+    def _parse_title_venue(self):
+        # APA: Authors (Year). Title. Venue, volume(issue), pages.
+        self._title = self._venue = None
+        if self._year:
+            rest = self.raw[self._year.end():].lstrip("*. ")
+            title, _, venue = rest.partition(". ")
+            self._title = title.strip() or None
+            venue = venue.split(",")[0].strip(" .")
+            self._venue = venue or None
+
+    @property
+    def title(self):
+        if self._title is _UNSET:
+            self._parse_title_venue()
+        return self._title
+
+    @property
+    def venue(self):
+        if self._venue is _UNSET:
+            self._parse_title_venue()
+        return self._venue
+
+    @property
+    def doi_text(self):
+        """The DOI as written: a doi.org URL, a bare DOI, or None."""
+        if self._doi_text is _UNSET:
+            match = DOI_URL.search(self.raw)
+            if match:
+                self._doi_text = match.group(0)
+            else:
+                match = DOI_PLAIN.search(self.raw)
+                self._doi_text = match.group(1) if match else None
+        return self._doi_text
+
+    @property
+    def doi(self):
+        """Normalized DOI (lowercase, no URL prefix or trailing dot), or None."""
+        if self._doi is _UNSET:
+            text = self.doi_text
+            self._doi = DOI_PREFIX.sub("", text).rstrip(".").lower() if text else None
+        return self._doi
+
+    @property
+    def normalized(self):
+        if self._normalized is _UNSET:
+            self._normalized = normalize_reference(self.raw)
+        return self._normalized
+
+    @property
+    def scan(self):
+        """Names of the per-reference rules matching, found in one pass."""
+        if self._scan is _UNSET:
+            self._scan = {m.lastgroup for m in REFERENCE_SCAN.finditer(self.raw)}
+        return self._scan
+
+    @property
+    def shingles(self):
+        if self._shingles is _UNSET:
+            norm = self.normalized
+            if len(norm) <= SHINGLE_SIZE:
+                self._shingles = {norm}
+            else:
+                self._shingles = {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+        return self._shingles
+
+    @property
+    def signature(self):
+        if self._signature is _UNSET:
+            self._signature = minhash_signature(self.shingles)
+        return self._signature
+
+def as_references(refs):
+    return [Reference.coerce(r) for r in refs]
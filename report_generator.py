@@ -1,8 +1,21 @@
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.colors import HexColor
+from reportlab.lib.utils import simpleSplit
+from reportlab.platypus import Flowable, Spacer
 import os
 from io import BytesIO
+from profiling import timed
+
+LEFT_MARGIN = 50
+RIGHT_MARGIN = 50
+TOP_MARGIN = 50
+BOTTOM_MARGIN = 100  # leaves room for the footer
+
+# (font name, font size, leading, left indent, space after)
+BODY_STYLE = ("Helvetica", 10, 13, 0, 2)
+ITEM_STYLE = ("Helvetica", 10, 13, 10, 2)
+HEADING_STYLE = ("Helvetica-Bold", 11, 14, 0, 4)
 
 def draw_section_title(c, y, title):
     c.setFillColor(HexColor("#003366"))
@@ -20,73 +33,175 @@ def add_footer(c, width, height, page_number):
     c.drawCentredString(width / 2, 18, f"Page {page_number}")
     c.setFillColor("black")
 
-def generate_pdf_report(analysis: dict, corrected_refs: list, reviews: str, formatting_results: dict):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    page_number = 1
+class SectionTitle(Flowable):
+    """Full-width coloured title bar, drawn with draw_section_title."""
 
-    logo_path = "image.png"
-    if os.path.exists(logo_path):
-        c.drawImage(logo_path, (width - 200) / 2, height - 80, width=200, height=40, mask='auto')
-        y = height - 120
-    else:
-        y = height - 50
+    def __init__(self, title):
+        super().__init__()
+        self.title = title
+
+    def wrap(self, available_width, available_height):
+        return available_width, 30
+
+    def draw(self):
+        # draw_section_title works in page coordinates; undo the frame offset
+        self.canv.translate(-LEFT_MARGIN, 0)
+        draw_section_title(self.canv, 10, self.title)
+
+class WrappedText(Flowable):
+    """
+    Plain text wrapped to the frame width. Much cheaper than a platypus
+    Paragraph (no markup parsing) and splittable at any line boundary.
+    """
+
+    def __init__(self, text, style=BODY_STYLE, lines=None):
+        super().__init__()
+        self.text = text
+        self.style = style
+        self.lines = lines
+        self.spaceAfter = style[4]
+
+    def wrap(self, available_width, available_height):
+        font, size, leading, indent, _ = self.style
+        if self.lines is None:
+            self.lines = simpleSplit(self.text, font, size, available_width - indent) or [""]
+        self.width = available_width
+        self.height = len(self.lines) * leading
+        return self.width, self.height
+
+    def split(self, available_width, available_height):
+        self.wrap(available_width, available_height)
+        fit = int(available_height // self.style[2])
+        if fit < 1 or fit >= len(self.lines):
+            return []
+        return [WrappedText(self.text, self.style, self.lines[:fit]),
+                WrappedText(self.text, self.style, self.lines[fit:])]
+
+    def draw(self):
+        font, size, leading, indent, _ = self.style
+        self.canv.setFont(font, size)
+        y = self.height - size
+        for line in self.lines:
+            self.canv.drawString(indent, y, line)
+            y -= leading
+
+class PageLayout:
+    """
+    Pagination and wrapping shared by every report section. Flowables are
+    placed top to bottom one at a time; when one does not fit, the footer is
+    drawn and a new page started, and paragraphs are split across pages
+    instead of being truncated. Nothing is kept once it has been drawn, so
+    callers can feed flowables from a generator.
+    """
+
+    def __init__(self, output, pagesize=letter):
+        self.canvas = canvas.Canvas(output, pagesize=pagesize, pageCompression=1)
+        self.width, self.height = pagesize
+        self.frame_width = self.width - LEFT_MARGIN - RIGHT_MARGIN
+        self.page_number = 1
+        self.y = self.height - TOP_MARGIN
+        self.at_page_top = True
+
+    def new_page(self):
+        add_footer(self.canvas, self.width, self.height, self.page_number)
+        self.canvas.showPage()
+        self.page_number += 1
+        self.y = self.height - TOP_MARGIN
+        self.at_page_top = True
 
-    y = draw_section_title(c, y, "📑 Article Quality & Reference Report")
+    def add(self, flowable):
+        available = self.y - BOTTOM_MARGIN
+        _, h = flowable.wrapOn(self.canvas, self.frame_width, available)
+        if h > available:
+            parts = flowable.split(self.frame_width, available)
+            if len(parts) > 1:
+                self.add(parts[0])
+                self.new_page()
+                for part in parts[1:]:
+                    self.add(part)
+                return
+            if not self.at_page_top:
+                self.new_page()
+                return self.add(flowable)
+            # Taller than a whole page and unsplittable: draw it anyway.
+        flowable.drawOn(self.canvas, LEFT_MARGIN, self.y - h)
+        self.y -= h + flowable.getSpaceAfter()
+        self.at_page_top = False
 
-    c.setFont("Helvetica", 10)
+    def add_all(self, flowables):
+        for flowable in flowables:
+            self.add(flowable)
+
+    def finish(self):
+        add_footer(self.canvas, self.width, self.height, self.page_number)
+        self.canvas.save()
+
+def _text(value, style=BODY_STYLE):
+    return WrappedText(str(value), style)
+
+def _summary_flowables(analysis):
+    yield SectionTitle("📑 Article Quality & Reference Report")
     for key, value in analysis.items():
         if isinstance(value, dict):
-            c.drawString(50, y, f"{key}:")
-            y -= 20
+            yield _text(f"{key}:")
             for subkey, subvalue in value.items():
-                c.drawString(60, y, f"- {subkey}: {len(subvalue)} issues")
-                y -= 15
+                yield _text(f"- {subkey}: {len(subvalue)} issues", ITEM_STYLE)
         elif isinstance(value, list):
-            c.drawString(50, y, f"{key}: {len(value)} issues")
-            y -= 20
+            yield _text(f"{key}: {len(value)} issues")
         else:
-            c.drawString(50, y, f"{key}: {value}")
-            y -= 15
-        if y < 100:
-            add_footer(c, width, height, page_number)
-            page_number += 1
-            c.showPage()
-            y = height - 50
+            yield _text(f"{key}: {value}")
 
-    if corrected_refs:
-        y = draw_section_title(c, y, "📚 Corrected References (APA 7)")
-        for i, ref in enumerate(corrected_refs, start=1):
-            c.drawString(50, y, f"{i}. {ref[:150]}")
-            y -= 15
-            if y < 100:
-                add_footer(c, width, height, page_number)
-                page_number += 1
-                c.showPage()
-                y = height - 50
+def _reference_flowables(corrected_refs):
+    yield SectionTitle("📚 Corrected References (APA 7)")
+    for i, ref in enumerate(corrected_refs, start=1):
+        yield _text(f"{i}. {ref}", ITEM_STYLE)
+
+def _review_flowables(reviews):
+    yield SectionTitle("🤖 AI Reviewer Feedback")
+    for block in reviews.split("\n"):
+        if block.strip():
+            yield _text(block.strip())
+
+def _formatting_flowables(formatting_results):
+    yield SectionTitle("📄 Formatting Check Summary")
+    for section, issues in formatting_results.items():
+        yield _text(section, HEADING_STYLE)
+        if issues:
+            for issue in issues:
+                yield _text(f"❌ {issue}", ITEM_STYLE)
+        else:
+            yield _text("✅ All OK", ITEM_STYLE)
 
+def report_flowables(analysis, corrected_refs, reviews, formatting_results):
+    """Lazily yield every flowable of the report, in order."""
+    yield from _summary_flowables(analysis)
+    if corrected_refs:
+        yield Spacer(1, 10)
+        yield from _reference_flowables(corrected_refs)
+    if reviews:
+        yield Spacer(1, 10)
+        yield from _review_flowables(reviews)
     if formatting_results:
-        y = draw_section_title(c, y, "📄 Formatting Check Summary")
-        for section, issues in formatting_results.items():
-            c.setFont("Helvetica-Bold", 11)
-            c.drawString(50, y, section)
-            y -= 18
-            c.setFont("Helvetica", 10)
-            if issues:
-                for issue in issues:
-                    c.drawString(60, y, f"❌ {issue[:100]}")
-                    y -= 14
-                    if y < 100:
-                        add_footer(c, width, height, page_number)
-                        page_number += 1
-                        c.showPage()
-                        y = height - 50
-            else:
-                c.drawString(60, y, "✅ All OK")
-                y -= 14
-
-    add_footer(c, width, height, page_number)
-    c.save()
-    buffer.seek(0)
+        yield Spacer(1, 10)
+        yield from _formatting_flowables(formatting_results)
+
+@timed()
+def generate_pdf_report(analysis: dict, corrected_refs: list, reviews: str, formatting_results: dict, output=None):
+    """
+    Render the report. output may be a file path or a binary file object
+    the PDF is written to; by default a rewound BytesIO is returned.
+    """
+    buffer = BytesIO() if output is None else output
+    layout = PageLayout(buffer)
+
+    logo_path = "image.png"
+    if os.path.exists(logo_path):
+        layout.canvas.drawImage(logo_path, (layout.width - 200) / 2, layout.height - 80,
+                                width=200, height=40, mask='auto')
+        layout.y = layout.height - 120
+
+    layout.add_all(report_flowables(analysis, corrected_refs, reviews, formatting_results))
+    layout.finish()
+    if output is None:
+        buffer.seek(0)
     return buffer
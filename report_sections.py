@@ -0,0 +1,27 @@
+"""
+Report sections of an analysis entry. Kept free of heavy imports so the
+app can lay out results without loading the analysis modules.
+"""
+
+# Reference report entries that describe the manuscript rather than list problems.
+NON_ISSUE_KEYS = {"Total References", "Extracted References", "Qubahan Citations", "error"}
+
+# Report sections in display order: (title, key in the analysis entry or
+# in its "docx_results").
+FORMATTING_SECTIONS = [
+    ("Font Checks", "Font Checks"),
+    ("Paragraph Format", "Paragraph Format"),
+    ("Margin Checks", "Margin Checks"),
+    ("Heading Structure", "heading_issues"),
+    ("Table and Figure Captions", "table_issues"),
+    ("Subheading Checks", "Subheading Checks"),
+    ("Bullet Point Checks", "Bullet Point Checks"),
+    ("References Style Checks", "References Style Checks"),
+]
+
+def formatting_results(entry):
+    docx_results = entry["docx_results"]
+    return {
+        title: entry[key] if key in entry else docx_results.get(key, [])
+        for title, key in FORMATTING_SECTIONS
+    }
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from rule_registry import RULESET_VERSION as PATTERN_VERSION
+
+# Bump the leading number whenever a checker changes its output so stale
+# cached results are never served for the same manuscript bytes. Pattern
+# changes are picked up automatically through the rule registry version.
+RULESET_VERSION = f"7.{PATTERN_VERSION}"
+
+def content_key(data, ruleset_version=RULESET_VERSION):
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{digest}-{ruleset_version}"
+
+class ResultCache:
+    """
+    In-memory LRU of analysis results keyed by content_key().
+
+    Each entry is a dict (extracted text, reference report, formatting
+    results, rendered reports...). When persist_dir is given, entries are
+    also pickled there so they survive restarts and LRU eviction.
+    """
+
+    def __init__(self, max_entries=32, persist_dir=None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, f"{key}.pkl")
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.persist_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+        if self.persist_dir:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+
+    def update(self, key, **fields):
+        entry = dict(self.get(key) or {})
+        entry.update(fields)
+        self.put(key, entry)
+        return entry
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,81 @@
+import hashlib
+import re
+from collections import namedtuple
+
+# A named, versioned, precompiled pattern. Bump version whenever a pattern's
+# behaviour changes so cached results keyed on RULESET_VERSION are dropped.
+Rule = namedtuple("Rule", ["name", "version", "pattern"])
+
+RULES = {}
+
+def register(name, version, pattern, flags=0):
+    if name in RULES:
+        raise ValueError(f"Rule '{name}' is already registered")
+    rule = Rule(name, version, re.compile(pattern, flags))
+    RULES[name] = rule
+    return rule.pattern
+
+def combine(*names):
+    """
+    Compile the named rules into one alternation with a named group per rule,
+    so a single finditer() pass reports every rule that matches a string.
+    """
+    parts = []
+    for name in names:
+        pattern = RULES[name].pattern
+        body = f"(?i:{pattern.pattern})" if pattern.flags & re.IGNORECASE else pattern.pattern
+        parts.append(f"(?P<{name}>{body})")
+    return re.compile("|".join(parts))
+
+def ruleset_version():
+    digest = hashlib.sha256()
+    for name in sorted(RULES):
+        digest.update(f"{name}:{RULES[name].version};".encode())
+    return digest.hexdigest()[:12]
+
+# --- references section -------------------------------------------------
+REFERENCES_SECTION = register("references_section", 1, r"(References|REFERENCES)[\s\n]+(.+)", re.DOTALL)
+LINE = register("line", 1, r"[^\n]+")
+
+# --- section index ------------------------------------------------------
+# Any line, with optional "1.", "2.3" or "IV." numbering split off (group 1).
+HEADING_LINE = register(
+    "heading_line", 1, r"^[ \t]*(?:(?:\d+(?:\.\d+)*|[IVX]+)[.)]?[ \t]+)?(\S[^\n]*?)[ \t\r]*$", re.MULTILINE
+)
+# "Table 2. ...", "Figure 3: ...", "Fig. 1 Overview": a line that starts with
+# the label, followed by punctuation, the end of the line or a capitalized word.
+CAPTION = register(
+    "caption", 1,
+    r"^[ \t]*((?i:table|fig(?:ure|\.)))[ \t]+(\d+)(?=[ \t]*[.:–—-]|[ \t\r]*$|[ \t]+[A-Z])",
+    re.MULTILINE
+)
+# "Table 2", "Fig. 3", "Figures 2–4", "Tables 1 and 2"
+TABLE_FIGURE_MENTION = register(
+    "table_figure_mention", 1,
+    r"\b(tables?|fig(?:ure)?s?\.?)[ \t]*(\d+)(?:[ \t]*(?:[-–]|and|&)[ \t]*(\d+))?", re.IGNORECASE
+)
+
+# --- per-reference checks -----------------------------------------------
+BOLD_YEAR = register("bold_year", 1, r"\*\*\(\d{4}\)\*\*")
+DOI_MENTION = register("doi_mention", 1, r"doi\.org", re.IGNORECASE)
+AUTHOR_SEPARATOR = register("author_separator", 1, r",| and |&")
+DIGIT = register("digit", 1, r"\d")
+
+DOI_PREFIX = register("doi_prefix", 1, r"(?:https?://(?:dx\.)?doi\.org/|\bdoi:\s*)", re.IGNORECASE)
+NON_ALNUM = register("non_alnum", 1, r"[^0-9a-z]+")
+
+# All per-reference checks in one pass.
+REFERENCE_SCAN = combine("bold_year", "doi_mention")
+
+# --- APA formatting -----------------------------------------------------
+YEAR_IN_PARENS = register("year_in_parens", 1, r"\(\s*(\d{4})\s*\)")
+# A DOI ends before closing punctuation: "(https://doi.org/10.1234/abc)."
+DOI_URL = register("doi_url", 2, r"https?://doi\.org/[^\s,;]*[^\s,;.)\]]", re.IGNORECASE)
+DOI_PLAIN = register("doi_plain", 2, r"(10\.\d{4,9}/[^\s,;]*[^\s,;.)\]])")
+
+# --- in-text citations --------------------------------------------------
+CITATION_LIST_SEPARATOR = register("citation_list_separator", 1, r"\s*,\s*")
+# Ranges and lists in a single alternation: group 1/2 = range, group 3 = list
+CITATION_TOKEN = register("citation_token", 1, r"\[(?:(\d+)\s*[-–]\s*(\d+)|(\d+(?:\s*,\s*\d+)*))\]")
+
+RULESET_VERSION = ruleset_version()
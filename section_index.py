@@ -0,0 +1,166 @@
+import string
+from bisect import bisect_right
+from collections import namedtuple
+from rule_registry import CAPTION, HEADING_LINE, REFERENCES_SECTION, TABLE_FIGURE_MENTION, register
+
+# Standard manuscript sections, matched as prefixes ("RESULT" -> "Results").
+SECTION_HEADINGS = (
+    "ABSTRACT", "KEYWORDS", "INTRODUCTION", "LITERATURE REVIEW", "BACKGROUND", "METHOD", "MATERIAL",
+    "RESULT", "DISCUSSION", "CONCLUSION", "ACKNOWLEDG", "REFERENCES", "BIBLIOGRAPHY", "APPENDIX",
+)
+# Words a combined heading may have besides section names ("Conclusion and Future Work").
+HEADING_EXTRA_WORDS = ("FUTURE WORK", "RELATED WORK", "LIMITATION", "RECOMMENDATION")
+_NAMES = "|".join(name.replace(" ", r"\s+") for name in SECTION_HEADINGS + HEADING_EXTRA_WORDS)
+# Otherwise a line is a heading only if it consists of section names joined
+# by "and", "&" or commas ("Results and Discussion"), so wrapped body lines
+# such as "the results of the proposed method" are not.
+SECTION_NAMES_LINE = register(
+    "section_names_line", 1, rf"(?:{_NAMES})[A-Z]*(?:\s*(?:,|&|\bAND\b)\s*(?:{_NAMES})[A-Z]*)*[\s:]*"
+)
+# Longest line that can end the reference list.
+HEADING_MAX_WORDS = 8
+# Inline headings ("Abstract: This paper ...") end in one of these.
+INLINE_HEADING_END = ":.—–-"
+# Wrapped reference lines look like headings ("Improved learning methods"),
+# so inside the reference list only a line starting with one of these ends it.
+# The list itself starts only at a heading line that is just (or opens with)
+# "References" or "Bibliography", not at a body line mentioning references.
+REFERENCE_SECTIONS = ("REFERENCES", "BIBLIOGRAPHY")
+REFERENCES_END_HEADINGS = ("APPENDIX", "ACKNOWLEDG")
+# "Tables 2-4" / "Table 1 and 2" name a range only if its end is at most this
+# far above the highest caption number; "Table 1 and 2020 figures" does not.
+MENTION_RANGE_SLACK = 5
+MENTION_KINDS = ("table", "figure")
+
+Heading = namedtuple("Heading", ["keys", "start", "body_start", "paragraph"])
+Section = namedtuple("Section", ["key", "start", "body_start", "end", "first_paragraph", "last_paragraph"])
+
+def _kind(label):
+    return "table" if label[0] in "tT" else "figure"
+
+class SectionIndex:
+    """
+    One pass over the manuscript text: section headings with their character
+    spans and paragraph (line) ranges, plus the position of every table and
+    figure caption and mention.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.line_starts = [0]
+        newline = text.find("\n")
+        while newline != -1:
+            self.line_starts.append(newline + 1)
+            newline = text.find("\n", newline + 1)
+
+        self.headings = []
+        self._reference_headings = []  # indices of headings that start a reference list
+        in_references = False
+        for m in HEADING_LINE.finditer(text):
+            heading = self._heading(m)
+            if heading and in_references and not self._ends_references(m.group(1)):
+                continue
+            if heading:
+                in_references = self._starts_references(m.group(1))
+                if in_references:
+                    self._reference_headings.append(len(self.headings))
+                self.headings.append(heading)
+
+        self.captions = {}  # (kind, number) -> [positions]
+        for m in CAPTION.finditer(text):
+            self.captions.setdefault((_kind(m.group(1)), int(m.group(2))), []).append(m.start(1))
+        caption_starts = {pos for positions in self.captions.values() for pos in positions}
+        highest = {kind: max((n for k, n in self.captions if k == kind), default=0) for kind in MENTION_KINDS}
+        self.mentions = {kind: [] for kind in MENTION_KINDS}  # kind -> [(first, last, position)], captions excluded
+        for m in TABLE_FIGURE_MENTION.finditer(text):
+            if m.start() in caption_starts:
+                continue
+            kind = _kind(m.group(1))
+            first = int(m.group(2))
+            last = int(m.group(3)) if m.group(3) else first
+            if not first <= last <= max(first, highest[kind]) + MENTION_RANGE_SLACK:
+                last = first
+            self.mentions[kind].append((first, last, m.start()))
+
+    def _heading(self, m):
+        line = m.group(1)
+        upper = line.upper()
+        for key in SECTION_HEADINGS:
+            if upper.startswith(key):
+                rest = line[len(key):].lstrip(string.ascii_letters)
+                if not rest.strip() or rest.lstrip()[0] in INLINE_HEADING_END:
+                    body_start = m.end() if not rest.strip() else m.start(1) + len(line) - len(rest.lstrip()) + 1
+                    return Heading((key,), m.start(), body_start, self.paragraph_at(m.start()))
+        if not SECTION_NAMES_LINE.fullmatch(upper):
+            return None
+        keys = tuple(key for key in SECTION_HEADINGS if key in upper)
+        return Heading(keys, m.start(), m.end(), self.paragraph_at(m.start())) if keys else None
+
+    @staticmethod
+    def _starts_references(line):
+        upper = line.upper()
+        for key in REFERENCE_SECTIONS:
+            if upper.startswith(key):
+                rest = line[len(key):].strip()
+                return not rest or rest[0] in INLINE_HEADING_END
+        return False
+
+    @staticmethod
+    def _ends_references(line):
+        return len(line.split()) <= HEADING_MAX_WORDS and line.upper().startswith(REFERENCES_END_HEADINGS)
+
+    def first_mention(self, kind, number):
+        """Position of the first mention of table or figure number, or None."""
+        for first, last, position in self.mentions[kind]:
+            if first <= number <= last:
+                return position
+        return None
+
+    def mentioned_numbers(self, kind):
+        """Every table or figure number mentioned in the text, sorted."""
+        return sorted({n for first, last, _ in self.mentions[kind] for n in range(first, last + 1)})
+
+    def paragraph_at(self, pos):
+        return bisect_right(self.line_starts, pos) - 1
+
+    def section(self, key, last=False):
+        """Span of the first (or last) section headed key, up to the next heading."""
+        positions = [i for i, heading in enumerate(self.headings) if key in heading.keys]
+        if not positions:
+            return None
+        return self._section_at(positions[-1] if last else positions[0], key)
+
+    def _section_at(self, i, key):
+        heading = self.headings[i]
+        end = self.headings[i + 1].start if i + 1 < len(self.headings) else len(self.text)
+        last_paragraph = self.paragraph_at(max(end - 1, heading.start))
+        return Section(key, heading.start, heading.body_start, end, heading.paragraph, last_paragraph)
+
+    def has_heading(self, key):
+        return any(key in heading.keys for heading in self.headings)
+
+    def _references_section(self):
+        if not self._reference_headings:
+            return None
+        i = self._reference_headings[-1]
+        return self._section_at(i, self.headings[i].keys[0])
+
+    def references_span(self):
+        """
+        (start, end) of the reference list: the body of the last section
+        headed References or Bibliography, else whatever follows the first
+        "References" in the text.
+        """
+        section = self._references_section()
+        if section:
+            return section.body_start, section.end
+        match = REFERENCES_SECTION.search(self.text)
+        return (match.start(2), match.end(2)) if match else None
+
+    def body_end(self):
+        """Where the reference list starts (in-text citations come before it)."""
+        section = self._references_section()
+        if section:
+            return section.start
+        span = self.references_span()
+        return span[0] if span else len(self.text)
@@ -1,34 +1,26 @@
 import streamlit as st
-import tempfile
-import re
+import hashlib
+import os
+import time
+import uuid
 from io import StringIO
-from file_parser import extract_text_from_pdf, extract_text_from_docx
-from ref_checker import check_references
-from citation_formatter import correct_references
-from report_generator import generate_pdf_report
-from format_checker import (
-    check_font_and_spacing,
-    check_paragraph_format,
-    check_margins,
-    check_headings,
-    check_tables_figures,
-    check_subheadings,
-    check_bullet_points,
-    check_reference_formatting
-)
+from result_cache import RULESET_VERSION, ResultCache, content_key
+from report_sections import formatting_results
+from job_service import ACTIVE, CANCELLED, DONE, POLL_SECONDS, QUEUED, JobService, QueueFull
+from profiling import timing_rows
+from style_profile import DEFAULT_PROFILE, available_profiles, load_profile
+from upload_store import UploadTooLarge
 
 st.set_page_config(page_title="Research AI Checker", layout="wide")
 st.title("🧠 Research Paper Quality & Format Checker")
 
 uploaded_file = st.file_uploader("📤 Upload your research article (PDF or DOCX)", type=["pdf", "docx"])
-
-def extract_author_name(text):
-    match = re.search(r"\n(.*?)\n.*?\n", text)
-    if match:
-        raw = match.group(1)
-        clean = re.sub(r"[\d\*]+", "", raw)
-        return re.sub(r"\s{2,}", " ", clean).strip(",; \n")
-    return ""
+profiles = available_profiles()
+style = st.selectbox(
+    "📏 Journal style profile", profiles,
+    index=profiles.index(DEFAULT_PROFILE) if DEFAULT_PROFILE in profiles else 0,
+    format_func=lambda name: load_profile(name).name,
+)
 
 def generate_formatting_txt_report(sections):
     buf = StringIO()
@@ -43,6 +35,88 @@ def generate_formatting_txt_report(sections):
         buf.write("\n")
     return buf.getvalue()
 
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(
+        max_entries=int(os.environ.get("QAJ_CACHE_SIZE", "32")),
+        persist_dir=os.environ.get("QAJ_CACHE_DIR") or None
+    )
+
+@st.cache_resource
+def get_upload_store():
+    # The same limits as the job queue's: QAJ_MAX_UPLOAD_MB / QAJ_SPILL_MB / QAJ_UPLOAD_MEMORY_MB
+    return get_job_service().queue.uploads
+
+@st.cache_resource
+def get_job_service():
+    # Analysis runs in pre-warmed worker processes (QAJ_WORKERS, default 2)
+    # fed from a SQLite job queue; QAJ_WORKERS=0 relies on workers started
+    # separately with `python job_service.py`.
+    return JobService()
+
+# Intermediate task results (parsed document, text, ...) are not shown
+PROGRESS_LABELS = {
+    "author": "Author detection",
+    "ref_report": "Reference checks",
+    "heading_issues": "Heading Structure",
+    "table_issues": "Table and Figure Captions",
+    "docx_results": "Formatting checks",
+}
+
+def wait_for_job(job_id, label):
+    """Poll a queued job, showing its progress; returns its final Job."""
+    service = get_job_service()
+    shown = 0
+    with st.status(label, expanded=True) as status:
+        cancel = st.empty()
+        if cancel.button("✖️ Cancel", key=f"cancel-{job_id}"):
+            service.cancel(job_id)
+        while True:
+            job = service.status(job_id)
+            status.update(label=f"{label} (waiting: {job.ahead} job(s) ahead)" if job.status == QUEUED else label)
+            for step in job.progress[shown:]:
+                name = PROGRESS_LABELS.get(step["step"])
+                if name:
+                    count = step["issues"] if step["step"] != "author" else 0
+                    st.write(f"✔️ {name}" + (f" — {count} issue(s)" if count else ""))
+            shown = len(job.progress)
+            if job.status not in ACTIVE:
+                break
+            time.sleep(POLL_SECONDS)
+            service.ensure_workers()
+        cancel.empty()
+        if job.status == DONE:
+            status.update(label=f"{label} done", state="complete", expanded=False)
+        else:
+            status.update(label=f"{label} {job.status}", state="error")
+    return job
+
+def run_job(cache_key, kind, submit, label):
+    """
+    Submit a job once per cache key and kind (reruns keep polling the same
+    job) and return its result, or stop the page if it did not finish.
+    """
+    jobs = st.session_state.setdefault("jobs", {})
+    job_id = jobs.get((cache_key, kind))
+    if job_id is None or get_job_service().status(job_id) is None:
+        try:
+            job_id = jobs[(cache_key, kind)] = submit()
+        except QueueFull as e:
+            st.warning(str(e))
+            st.stop()
+    job = wait_for_job(job_id, label)
+    if job.status == DONE:
+        del jobs[(cache_key, kind)]
+        return get_job_service().result(job_id)
+    if job.status == CANCELLED:
+        st.warning("Cancelled.")
+    else:
+        st.error(f"❌ {job.error}")
+    if st.button("🔄 Run again", key=f"again-{job_id}"):
+        del jobs[(cache_key, kind)]
+        st.rerun()
+    st.stop()
+
 def show_checklist(title, issues):
     st.markdown(f"### {title}")
     if issues:
@@ -51,32 +125,62 @@ def show_checklist(title, issues):
     else:
         st.markdown("✅ All OK")
 
+# Start the workers (and their warm-up) while the user picks a file; the
+# analysis, reporting and review modules are imported where first used.
+get_job_service()
+
 if uploaded_file:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=uploaded_file.name[-5:]) as tmp:
-        tmp.write(uploaded_file.read())
-        path = tmp.name
+    cache = get_result_cache()
+    style_profile = load_profile(style)
+    # Results depend on the profile as much as on the rules
+    cache_key = content_key(uploaded_file.getbuffer(), f"{RULESET_VERSION}-{style_profile.key}")
+    entry = cache.get(cache_key)
+    if entry is None:
+        try:
+            get_upload_store().check_size(uploaded_file.name, uploaded_file)
+        except UploadTooLarge as e:
+            st.error(str(e))
+            st.stop()
+        # Re-uploads under the same file name in this session are diffed
+        # against its last revision; other sessions never see it
+        session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+        entry = run_job(cache_key, "analyze", lambda: get_job_service().submit_analysis(
+            uploaded_file.name, uploaded_file, style=style, revision_key=f"{session_id}/{uploaded_file.name}"
+        ), "Analyzing manuscript…")
+        # The cache is shared by every session, so the diff against this
+        # session's previous revision stays in the session
+        revisions = st.session_state.setdefault("revisions", {})
+        revisions[uploaded_file.name] = (cache_key, entry.pop("revision", {}))
+        cache.put(cache_key, entry)
 
-    if uploaded_file.name.endswith(".pdf"):
-        text = extract_text_from_pdf(open(path, "rb"))
-        font_issues = paragraph_issues = margin_issues = subheading_issues = bullet_issues = ref_format_issues = []
-    else:
-        text = extract_text_from_docx(open(path, "rb"))
-        font_issues = check_font_and_spacing(path)
-        paragraph_issues = check_paragraph_format(path)
-        margin_issues = check_margins(path)
-        subheading_issues = check_subheadings(path)
-        bullet_issues = check_bullet_points(path)
-        ref_format_issues = check_reference_formatting(path)
-
-    author = extract_author_name(text)
+    fmt_results = formatting_results(entry)
+    font_issues = fmt_results["Font Checks"]
+    paragraph_issues = fmt_results["Paragraph Format"]
+    margin_issues = fmt_results["Margin Checks"]
+    heading_issues = fmt_results["Heading Structure"]
+    table_issues = fmt_results["Table and Figure Captions"]
+    subheading_issues = fmt_results["Subheading Checks"]
+    bullet_issues = fmt_results["Bullet Point Checks"]
+    ref_format_issues = fmt_results["References Style Checks"]
+
+    author = entry["author"]
     if author:
         st.markdown(f"**🧑‍💼 Detected Author Name:** `{author}`")
 
-    ref_report = check_references(text, author)
+    ref_report = entry["ref_report"]
     refs = ref_report.get("Extracted References", [])
 
-    heading_issues = check_headings(text)
-    table_issues = check_tables_figures(text)
+    revision_key, revision = st.session_state.get("revisions", {}).get(uploaded_file.name, (None, {}))
+    if revision_key != cache_key:
+        revision = {}  # analyzed by another session, or an older revision's diff
+    if revision and not revision["first_revision"]:
+        st.subheader("🔁 Changes Since Previous Upload")
+        fixed = sum(len(v) for v in revision["fixed"].values())
+        introduced = sum(len(v) for v in revision["introduced"].values())
+        st.markdown(f"✅ {fixed} issues fixed, ❌ {introduced} issues introduced "
+                    f"({revision['reused']} results reused, {revision['evaluated']} re-evaluated)")
+        with st.expander("Show details"):
+            st.json(revision)
 
     st.subheader("📑 Reference Analysis Summary")
     st.json(ref_report)
@@ -103,23 +207,69 @@ if uploaded_file:
                         st.markdown(f"&nbsp;&nbsp;&nbsp;&nbsp;{idx}. {r}")
                     shown.add(r)
 
-    # Qubahan citations
+    # Citations of the profile's journal (reported under the "Qubahan" keys)
     qaj_list = ref_report.get("Qubahan Citations", [])
     if qaj_list:
-        st.subheader("🔍 Qubahan Academic Journal Citations")
-        st.markdown(f"Total QAJ citations: {len(qaj_list)}")
-        if len(qaj_list) > 2:
+        references = style_profile.section("references")
+        journal = references.get("journal_citation_name", "Qubahan Academic Journal")
+        limit = references.get("journal_citation_limit", 2)
+        st.subheader(f"🔍 {journal} Citations")
+        st.markdown(f"Total citations of {journal}: {len(qaj_list)}")
+        if len(qaj_list) > limit:
             excess = ref_report.get("Excess Qubahan Citations", [])
-            st.error(f"❌ Only up to 2 QAJ citations allowed. {len(excess)} over:")
+            st.error(f"❌ Only up to {limit} citation(s) of {journal} allowed. {len(excess)} over:")
             for r in excess:
                 st.markdown(f"&nbsp;&nbsp;&nbsp;&nbsp;{r}")
 
+    # Citation patterns across every submission checked so far (QAJ_CORPUS)
+    if os.environ.get("QAJ_CORPUS"):
+        from citation_corpus import get_corpus, submission_key
+        corpus = get_corpus()
+        st.subheader("🗂️ Across Submissions")
+        # Stored under this session's revision key if this session analyzed it
+        digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        key = submission_key(digest, f"{st.session_state['session_id']}/{uploaded_file.name}"
+                             if "session_id" in st.session_state else None)
+        shared = corpus.shared_blocks(key if key in corpus else digest)
+        if shared:
+            st.error("❌ Runs of references also appear, in the same order, in other submissions:")
+            for block in shared:
+                here = ", ".join(f"{first}–{last}" for first, last in block["references"])
+                there = ", ".join(f"{first}–{last}" for first, last in block["their_references"])
+                st.markdown(f"&nbsp;&nbsp;&nbsp;&nbsp;References {here} — **{block['submission']}** (references {there})")
+        else:
+            st.success("✅ No block of references is shared with other submissions.")
+        with st.expander("👥 Most cited authors this quarter"):
+            st.table(corpus.top_authors(limit=10))
+        query = st.text_input("🔎 Find submissions citing a DOI, title or reference")
+        if query:
+            citing = corpus.citing(query)
+            if citing:
+                st.table(citing)
+            else:
+                st.info("No checked submission cites it.")
+
     # Corrected APA references
     if st.checkbox("✨ Show corrected references in APA 7 style"):
+        from citation_formatter import correct_references
         corrected = correct_references(refs)
         for i, r in enumerate(corrected, start=1):
             st.markdown(f"{i}. {r}")
 
+    # AI review from the local model backend, streamed as it is generated
+    st.subheader("🤖 AI Reviewer Feedback")
+    reviews = entry.get("reviews", "")
+    if reviews:
+        st.markdown(reviews)
+    elif st.button("📝 Generate AI review"):
+        from ollama_wrapper import BACKEND_ERRORS, stream_review
+        try:
+            reviews = st.write_stream(stream_review(entry["text"]))
+        except BACKEND_ERRORS as e:
+            st.error(f"❌ The local review backend failed: {e}")
+        if reviews:
+            entry = cache.update(cache_key, reviews=reviews, pdf_report=None)
+
     # Formatting & Style Check
     st.subheader("🧾 Formatting & Style Check")
     show_checklist("🔤 Font Checks", font_issues)
@@ -131,16 +281,10 @@ if uploaded_file:
     show_checklist("• Bullet Point Style Checks", bullet_issues)
     show_checklist("📚 References Style Checks", ref_format_issues)
 
-    fmt_text = generate_formatting_txt_report([
-        ("Font Checks", font_issues),
-        ("Paragraph Format", paragraph_issues),
-        ("Margin Checks", margin_issues),
-        ("Heading Structure", heading_issues),
-        ("Table and Figure Captions", table_issues),
-        ("Subheading Checks", subheading_issues),
-        ("Bullet Point Checks", bullet_issues),
-        ("References Style Checks", ref_format_issues)
-    ])
+    fmt_text = entry.get("txt_report")
+    if fmt_text is None:
+        fmt_text = generate_formatting_txt_report(fmt_results.items())
+        entry = cache.update(cache_key, txt_report=fmt_text)
     st.download_button(
         "📥 Download Formatting Report (.txt)",
         fmt_text,
@@ -149,23 +293,27 @@ if uploaded_file:
     )
 
     if st.button("📄 Download Full Report as PDF"):
-        corrected = correct_references(refs)
-        fmt_results = {
-            "Font Checks": font_issues,
-            "Paragraph Format": paragraph_issues,
-            "Margin Checks": margin_issues,
-            "Heading Structure": heading_issues,
-            "Table and Figure Captions": table_issues,
-            "Subheading Checks": subheading_issues,
-            "Bullet Point Checks": bullet_issues,
-            "References Style Checks": ref_format_issues
-        }
-        pdf_buf = generate_pdf_report(ref_report, corrected, "", fmt_results)
+        pdf_bytes = entry.get("pdf_report")
+        if pdf_bytes is None:
+            report = run_job(cache_key, "report", lambda: get_job_service().submit_report(
+                ref_report, entry.get("reviews", ""), fmt_results
+            ), "Rendering PDF report…")
+            pdf_bytes = report["pdf"]
+            timings = entry.get("timings", {"stages": {}, "profile": None})
+            timings = dict(timings, stages={**timings["stages"], **report["timings"]["stages"]})
+            entry = cache.update(cache_key, pdf_report=pdf_bytes, timings=timings)
         st.download_button(
             "📥 Download PDF",
-            pdf_buf.getvalue(),
+            pdf_bytes,
             "QAJ_AI_Report.pdf",
             "application/pdf"
         )
+
+    timings = entry.get("timings")
+    if timings:
+        with st.expander("⏱️ Processing Time by Stage"):
+            st.table(timing_rows(timings))
+            if timings["profile"]:
+                st.code(timings["profile"])
 else:
     st.info("Upload a PDF or DOCX research article to begin analysis.")
@@ -0,0 +1,140 @@
+"""
+Journal style profiles: JSON (or YAML, when PyYAML is installed) files in
+profiles/ that describe the fonts, spacing, indents, reference rules and
+page layout a journal requires. A profile can start from another one:
+
+    {"extends": "qaj", "name": "Other Journal", "body": {"font_size_pt": 11}}
+
+Lengths carry their unit in the key (font_size_pt, left_indent_in,
+margin_mm, ...) and are converted to EMU when a profile is compiled. Each
+checker compiles its part of a profile once (StyleProfile.compiled) and
+loaded profiles are cached until their file changes, so checking many
+manuscripts against several journals never re-reads the configuration.
+"""
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+
+try:
+    import yaml
+except ImportError:  # YAML profiles are optional
+    yaml = None
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+DEFAULT_PROFILE = os.environ.get("QAJ_STYLE_PROFILE", "qaj")
+PROFILE_EXTENSIONS = (".json", ".yaml", ".yml")
+# EMU per unit, as in docx.shared (not imported: it loads all of python-docx)
+UNITS = {"pt": 12700, "in": 914400, "mm": 36000, "cm": 360000, "emu": 1}
+
+class ProfileError(ValueError):
+    pass
+
+def length(section, name, default=None):
+    """section["<name>_<unit>"] in EMU, for any unit in UNITS."""
+    for unit, emu in UNITS.items():
+        key = f"{name}_{unit}"
+        if key in section:
+            return int(section[key] * emu)
+    if default is None:
+        raise ProfileError(f"Missing length '{name}' (give it as {name}_pt, {name}_in, {name}_mm, ...)")
+    return default
+
+def has_length(section, name):
+    return any(f"{name}_{unit}" in section for unit in UNITS)
+
+def available_profiles(directory=PROFILE_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.splitext(name)[0] for name in os.listdir(directory) if name.endswith(PROFILE_EXTENSIONS)
+    )
+
+def find_profile(name, directories=(PROFILE_DIR,)):
+    """Path of a profile given by name (e.g. "qaj") or by path."""
+    if os.path.isfile(name):
+        return os.path.abspath(name)
+    for directory in directories:
+        for extension in PROFILE_EXTENSIONS:
+            path = os.path.join(directory, name + extension)
+            if os.path.isfile(path):
+                return path
+    raise ProfileError(f"Unknown style profile '{name}' (available: {', '.join(available_profiles())})")
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        if yaml is None:
+            raise ProfileError(f"{path}: YAML profiles need PyYAML (pip install pyyaml)")
+        return yaml.safe_load(f)
+
+def _merge(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        name, _, unit = key.rpartition("_")
+        if unit in UNITS:  # margin_mm replaces an inherited margin_in
+            for other in UNITS:
+                merged.pop(f"{name}_{other}", None)
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def read_profile(path, _seen=()):
+    """The profile at path as a dict, with "extends" resolved."""
+    if path in _seen:
+        raise ProfileError(f"Style profiles extend each other in a loop: {path}")
+    config = _read(path)
+    if not isinstance(config, dict):
+        raise ProfileError(f"{path}: a style profile must be a mapping")
+    parent = config.pop("extends", None)
+    if parent:
+        parent_path = find_profile(parent, (os.path.dirname(path), PROFILE_DIR))
+        config = _merge(read_profile(parent_path, _seen + (path,)), config)
+    return config
+
+class StyleProfile:
+    """A loaded profile; id is its file name, key a digest of its contents."""
+
+    __slots__ = ("id", "name", "key", "config", "_compiled", "_lock")
+
+    def __init__(self, id, config):
+        self.id = id
+        self.name = config.get("name", id)
+        self.key = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+        self.config = config
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def section(self, name):
+        return self.config.get(name, {})
+
+    def compiled(self, part, compile):
+        """compile(self) the first time part is asked for, then the cached result."""
+        with self._lock:
+            if part not in self._compiled:
+                self._compiled[part] = compile(self)
+            return self._compiled[part]
+
+    def __reduce__(self):
+        # Compiled parts and the lock stay behind; workers recompile once
+        return StyleProfile, (self.id, self.config)
+
+    def __repr__(self):
+        return f"StyleProfile({self.id!r}, key={self.key!r})"
+
+@lru_cache(maxsize=None)
+def _load(path, mtime):
+    return StyleProfile(os.path.splitext(os.path.basename(path))[0], read_profile(path))
+
+def load_profile(name=None):
+    """Load (or reuse) a profile by name or path; the default is QAJ_STYLE_PROFILE or "qaj"."""
+    path = find_profile(name or DEFAULT_PROFILE)
+    return _load(path, os.stat(path).st_mtime_ns)
+
+def resolve_profile(profile):
+    """Accept a StyleProfile, a profile name/path, or None for the default."""
+    return profile if isinstance(profile, StyleProfile) else load_profile(profile)
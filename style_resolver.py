@@ -0,0 +1,148 @@
+"""
+Effective run formatting of a DOCX, as Word displays it: document defaults,
+then the paragraph style and the run's character style (each with its
+basedOn chain), then the run's direct formatting. Styles are resolved once
+per document and memoized; a run only adds its own w:rPr on top.
+"""
+import weakref
+from collections import namedtuple
+
+from lxml import etree
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+THEME_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/theme"
+
+def _w(name):
+    return f"{{{W}}}{name}"
+
+VAL = _w("val")
+RFONTS, SZ, BOLD, ITALIC, COLOR = _w("rFonts"), _w("sz"), _w("b"), _w("i"), _w("color")
+ASCII, ASCII_THEME = _w("ascii"), _w("asciiTheme")
+# w:val of a toggle property (w:b, w:i) that switches it off
+OFF = {"0", "false", "off"}
+
+RUN_PROPERTIES = ("font_name", "font_size", "bold", "italic", "color")
+# Characters start:end of a paragraph's text whose runs share one effective
+# formatting; font_size is in points, color an RGB hex string or None.
+RunSpan = namedtuple("RunSpan", ("start", "end") + RUN_PROPERTIES)
+
+DEFAULTS = {"font_name": None, "font_size": None, "bold": False, "italic": False, "color": None}
+
+RUNS = etree.XPath("./w:r | ./w:hyperlink/w:r", namespaces={"w": W})
+
+def _theme_fonts(part):
+    """{"major": typeface, "minor": typeface} from the document's theme, if any."""
+    for rel in part.rels.values():
+        if rel.reltype == THEME_RELATIONSHIP and not rel.is_external:
+            theme = etree.fromstring(rel.target_part.blob)
+            fonts = {}
+            for kind in ("major", "minor"):
+                latin = theme.find(f".//{{{A}}}{kind}Font/{{{A}}}latin")
+                if latin is not None and latin.get("typeface"):
+                    fonts[kind] = latin.get("typeface")
+            return fonts
+    return {}
+
+def rpr_values(rPr, theme_fonts):
+    """The properties a w:rPr element sets, as {name: value}."""
+    values = {}
+    if rPr is None:
+        return values
+    for child in rPr:
+        tag = child.tag
+        if tag == RFONTS:
+            theme = child.get(ASCII_THEME)  # takes precedence over w:ascii
+            name = theme_fonts.get("major" if theme.startswith("major") else "minor") if theme else child.get(ASCII)
+            if name:
+                values["font_name"] = name
+        elif tag == SZ:
+            values["font_size"] = int(child.get(VAL)) / 2  # half-points
+        elif tag == BOLD:
+            values["bold"] = child.get(VAL, "true").lower() not in OFF
+        elif tag == ITALIC:
+            values["italic"] = child.get(VAL, "true").lower() not in OFF
+        elif tag == COLOR:
+            color = child.get(VAL)
+            values["color"] = None if color in (None, "auto") else color.upper()
+    return values
+
+class StyleResolver:
+    def __init__(self, styles, theme_fonts=None):
+        self.theme_fonts = theme_fonts or {}
+        self._styles = {}
+        self.default_paragraph_style = None
+        for style in styles.iterchildren(_w("style")):
+            style_id = style.get(_w("styleId"))
+            self._styles[style_id] = style
+            if style.get(_w("type")) == "paragraph" and style.get(_w("default")) in ("1", "true"):
+                self.default_paragraph_style = style_id
+        self.defaults = dict(DEFAULTS)
+        self.defaults.update(rpr_values(styles.find(f"{_w('docDefaults')}/{_w('rPrDefault')}/{_w('rPr')}"),
+                                        self.theme_fonts))
+        self._style_values = {}
+        self._bases = {}
+
+    @classmethod
+    def for_part(cls, part):
+        return cls(part.styles.element, _theme_fonts(part))
+
+    def style_values(self, style_id, _seen=()):
+        """Run properties set by a style or the styles it is basedOn."""
+        values = self._style_values.get(style_id)
+        if values is not None:
+            return values
+        style = self._styles.get(style_id)
+        if style is None or style_id in _seen:
+            return {}
+        based_on = style.find(_w("basedOn"))
+        values = dict(self.style_values(based_on.get(VAL), _seen + (style_id,))) if based_on is not None else {}
+        values.update(rpr_values(style.find(_w("rPr")), self.theme_fonts))
+        self._style_values[style_id] = values
+        return values
+
+    def base(self, paragraph_style, run_style):
+        """Effective properties (a tuple in RUN_PROPERTIES order) before direct formatting."""
+        key = (paragraph_style, run_style)
+        base = self._bases.get(key)
+        if base is None:
+            values = dict(self.defaults)
+            values.update(self.style_values(paragraph_style or self.default_paragraph_style))
+            if run_style:
+                values.update(self.style_values(run_style))
+            base = self._bases[key] = tuple(values[name] for name in RUN_PROPERTIES)
+        return base
+
+    def run_spans(self, p):
+        """
+        RunSpans of a w:p element. Adjacent runs that look the same are
+        merged; whitespace-only runs are skipped (their font is invisible).
+        """
+        paragraph_style = p.style
+        spans = []
+        offset = 0
+        for r in RUNS(p):
+            text = r.text
+            start = offset
+            offset += len(text)
+            if not text.strip():
+                continue
+            rPr = r.rPr
+            properties = self.base(paragraph_style, rPr.style if rPr is not None else None)
+            direct = rpr_values(rPr, self.theme_fonts)
+            if direct:
+                properties = tuple(direct.get(name, value) for name, value in zip(RUN_PROPERTIES, properties))
+            if spans and tuple(spans[-1][2:]) == properties:
+                spans[-1] = spans[-1]._replace(end=offset)
+            else:
+                spans.append(RunSpan(start, offset, *properties))
+        return tuple(spans)
+
+_resolvers = weakref.WeakKeyDictionary()
+
+def resolver_for(part):
+    """The StyleResolver of a document part, built on first use."""
+    resolver = _resolvers.get(part)
+    if resolver is None:
+        resolver = _resolvers[part] = StyleResolver.for_part(part)
+    return resolver
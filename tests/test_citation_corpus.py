@@ -0,0 +1,39 @@
+import pytest
+
+from citation_corpus import CitationCorpus, submission_key
+
+SHARED = [
+    "Smith, J. (2020). Learning to check manuscripts. Journal of Tests, 1(2), 3-4.",
+    "Brown, A. (2019). Wrapped reference lines in PDFs. Journal of Tests, 2(1), 5-6.",
+    "Green, B. (2018). Another reference long enough to count. Journal of Tests, 3(1), 7-8.",
+]
+
+@pytest.fixture
+def corpus(tmp_path):
+    return CitationCorpus(str(tmp_path / "corpus.sqlite"))
+
+def authors(corpus):
+    return {row["author"]: (row["citations"], row["submissions"]) for row in corpus.top_authors("0000-00", "9999-99")}
+
+def test_authors_are_counted_per_submission(corpus):
+    corpus.add_submission("a", "A", ["Smith, J. (2020). Same title. Journal X."])
+    corpus.add_submission("b", "B", ["Smithe, J. (2020). Same title. Journal X."])
+    corpus.add_submission("a", "A", ["Smith, J. (2020). Same title. Journal X."])
+    assert authors(corpus) == {"smith": (1, 1), "smithe": (1, 1)}
+    assert [row["submission"] for row in corpus.citing_author("smithe")] == ["B"]
+    assert sorted(row["submission"] for row in corpus.citing("Same title")) == ["A", "B"]
+
+def test_reused_blocks_are_reported_against_other_submissions(corpus):
+    corpus.add_submission("a", "A", SHARED + ["White, C. (2017). Only in A. Journal Y."])
+    corpus.add_submission("b", "B", ["Black, D. (2016). Only in B. Journal Y."] + SHARED)
+    assert corpus.shared_blocks("a") == [{"submission": "B", "references": [(1, 3)], "their_references": [(2, 4)]}]
+    assert corpus.reused_blocks() == [{"submissions": ["A", "B"], "references": SHARED}]
+
+def test_revisions_replace_the_earlier_revision(corpus):
+    key = submission_key("sha-1", "session/paper.docx")
+    assert key == submission_key("sha-2", "session/paper.docx") != submission_key("sha-1")
+    corpus.add_submission(key, "paper.docx", SHARED)
+    corpus.add_submission(key, "paper.docx", SHARED + ["White, C. (2017). Added later. Journal Y."])
+    assert key in corpus and "sha-1" not in corpus
+    assert corpus.shared_blocks(key) == []
+    assert authors(corpus)["smith"] == (1, 1)
@@ -0,0 +1,21 @@
+import io
+
+from docx import Document
+
+from format_checker import FONT_SECTION, analyze_docx
+
+def docx(*runs):
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    for text, font in runs:
+        paragraph.add_run(text).font.name = font
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+def test_run_positions_refer_to_the_quoted_text():
+    source = docx(("    Palatino text ", "Palatino Linotype"), ("Times", "Times New Roman"))
+    issue = analyze_docx(source, [FONT_SECTION])[FONT_SECTION][0]
+    assert issue == "Font not Palatino Linotype in: 'Palatino text Times' (characters 15–19: Times New Roman)"
+    assert "Palatino text Times"[14:19] == "Times"
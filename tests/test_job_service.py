@@ -0,0 +1,66 @@
+import os
+import time
+from collections import Counter
+
+import pytest
+
+from job_service import AFFINITY_SECONDS, DONE, KEEP_SECONDS, QUEUED, RUNNING, JobQueue, issue_count
+from upload_store import UploadStore
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), uploads=UploadStore(spill_dir=str(tmp_path / "spool")))
+
+def test_revisions_go_to_the_worker_holding_their_checker(queue):
+    queue.save_revision("session/paper.docx", Counter({("Font Checks", "x"): 1}), worker=1)
+    job_id = queue.submit("analyze", {"revision_key": "session/paper.docx"}, "paper.docx", b"data")
+    other = queue.submit("report", {})
+    assert queue.claim(2)[0] == other
+    assert queue.claim(2) is None
+    assert queue.claim(1)[0] == job_id
+
+def test_revisions_fall_back_to_any_worker_after_waiting(queue):
+    queue.save_revision("session/paper.docx", Counter(), worker=1)
+    job_id = queue.submit("analyze", {"revision_key": "session/paper.docx"}, "paper.docx", b"data")
+    queue._connect().execute("UPDATE jobs SET submitted = ?", (time.time() - AFFINITY_SECONDS - 1,))
+    assert queue.claim(2)[0] == job_id
+    assert queue.status(job_id).status == RUNNING
+
+def test_recovering_a_dead_worker_releases_its_revisions(queue):
+    queue.save_revision("session/paper.docx", Counter(), worker=1)
+    running = queue.submit("analyze", {"revision_key": "session/paper.docx"}, "paper.docx", b"data")
+    assert queue.claim(1)[0] == running
+    queue.recover([1])
+    assert queue.status(running).status == QUEUED
+    assert queue.claim(2)[0] == running
+
+def test_start_up_recovery_requeues_only_jobs_of_dead_workers(queue):
+    live = queue.submit("report", {})
+    dead = queue.submit("report", {})
+    queue.claim(os.getpid())
+    queue.claim(2 ** 22 + 1)  # above the default pid_max, so never a live process
+    queue.recover()
+    assert queue.status(live).status == RUNNING
+    assert queue.status(dead).status == QUEUED
+
+def test_finished_jobs_expire_as_other_jobs_close(queue):
+    old = queue.submit("report", {})
+    queue.claim(1)
+    queue.finish(old, {"pdf": b"x"})
+    queue._connect().execute("UPDATE jobs SET finished = ?", (time.time() - KEEP_SECONDS - 1,))
+    new = queue.submit("report", {})
+    queue.claim(1)
+    queue.finish(new, {"pdf": b"y"})
+    assert queue.status(old) is None
+    assert queue.status(new).status == DONE
+    assert queue.result(new) == {"pdf": b"y"}
+
+def test_issue_count_skips_entries_that_are_not_issues():
+    report = {
+        "Total References": 3,
+        "Extracted References": ["a", "b", "c"],
+        "Qubahan Citations": ["a", "b", "c"],
+        "Excess Qubahan Citations": ["c"],
+        "APA Style Violations": {"Missing Bold Year": ["a", "b"], "Contains DOI": []},
+    }
+    assert issue_count(report) == 3
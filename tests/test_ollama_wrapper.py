@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama_wrapper import ReviewCache, review_sections, split_sections, stream_review
+
+class StubBackend(ThreadingHTTPServer):
+    """
+    A local /api/generate that streams "<heading> review." token by token.
+    Sections listed in slow answer more slowly, so later sections can finish
+    first; malformed makes every response a line that is not JSON.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, slow=(), malformed=False):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.slow = set(slow)
+        self.malformed = malformed
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        heading = body["prompt"].split("--- MANUSCRIPT SECTION ---\n", 1)[1].split("\n", 1)[0]
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            if server.malformed:
+                self.wfile.write(b"<html>Bad gateway</html>\n")
+                return
+            for token in (heading, " review", "."):
+                time.sleep(0.05 if heading in server.slow else 0.01)
+                self.wfile.write(json.dumps({"response": token, "done": False}).encode() + b"\n")
+                self.wfile.flush()
+            self.wfile.write(json.dumps({"response": "", "done": True}).encode() + b"\n")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+@pytest.fixture
+def backend_factory():
+    servers = []
+
+    def start(**options):
+        server = StubBackend(**options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+TEXT = "Introduction\nWhy.\nMethods\nHow.\nResults\nWhat.\n"
+
+def test_sections_are_streamed_in_manuscript_order(backend_factory):
+    backend = backend_factory(slow={"Introduction"})
+    output = "".join(stream_review(TEXT, model_name=uuid.uuid4().hex, host=backend.url))
+    assert output == (
+        "\n\n**Section 1/3**\n\nIntroduction review."
+        "\n\n**Section 2/3**\n\nMethods review."
+        "\n\n**Section 3/3**\n\nResults review."
+    )
+
+def test_requests_in_flight_never_exceed_the_concurrency_cap(backend_factory):
+    backend = backend_factory(slow={f"Section {i}" for i in range(8)})
+    chunks = [f"Section {i}\nText." for i in range(8)]
+    reviews = asyncio.run(review_sections(chunks, host=backend.url, max_concurrency=2, cache=ReviewCache()))
+    assert reviews == [f"Section {i} review." for i in range(8)]
+    assert backend.requests == 8
+    assert backend.max_in_flight == 2
+
+def test_reviewed_sections_are_served_from_the_cache(backend_factory, tmp_path):
+    backend = backend_factory()
+    chunks = split_sections(TEXT)
+    cache = ReviewCache(str(tmp_path))
+    first = asyncio.run(review_sections(chunks, host=backend.url, cache=cache))
+    tokens = []
+    again = asyncio.run(review_sections(
+        chunks, host=backend.url, cache=cache, on_token=lambda index, token: tokens.append((index, token))
+    ))
+    from_disk = asyncio.run(review_sections(chunks, host=backend.url, cache=ReviewCache(str(tmp_path))))
+    assert first == again == from_disk == ["Introduction review.", "Methods review.", "Results review."]
+    assert sorted(tokens) == [(0, "Introduction review."), (1, "Methods review."), (2, "Results review.")]
+    assert backend.requests == 3
+
+def test_bounded_cache_keeps_the_most_recent_responses():
+    cache = ReviewCache(max_entries=2)
+    for prompt in ("a", "b", "c"):
+        cache.put("model", prompt, prompt.upper())
+    assert cache.get("model", "a") is None
+    assert (cache.get("model", "b"), cache.get("model", "c")) == ("B", "C")
+
+def test_a_line_that_is_not_json_is_a_backend_error(backend_factory):
+    backend = backend_factory(malformed=True)
+    with pytest.raises(RuntimeError, match="not JSON"):
+        "".join(stream_review(TEXT, model_name=uuid.uuid4().hex, host=backend.url))
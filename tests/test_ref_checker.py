@@ -0,0 +1,26 @@
+import json
+
+from ref_checker import check_references
+from style_profile import load_profile
+
+TEXT = (
+    "Introduction\nSee [1], [2], [3] and [4].\nReferences\n"
+    "[1] Smith, J. (2020). First paper. International Journal of X, 1(2), 3-4.\n"
+    "[2] Brown, A. (2019). Second paper. International Journal of X, 2(1), 5-6.\n"
+    "[3] Green, B. (2018). Third paper. Qubahan Academic Journal, 3(1), 7-8.\n"
+    "[4] White, C. (2017). Fourth paper. Qubahan Academic Journal, 4(1), 9-10.\n"
+)
+
+def test_journal_citations_are_capped_per_profile(tmp_path):
+    path = tmp_path / "ijx.json"
+    path.write_text(json.dumps({
+        "extends": "qaj", "name": "International Journal of X",
+        "references": {"journal_citation_name": "International Journal of X", "journal_citation_limit": 1},
+    }))
+    report = check_references(TEXT, profile=load_profile(str(path)))
+    assert [r[:3] for r in report["Qubahan Citations"]] == ["[1]", "[2]"]
+    assert [r[:3] for r in report["Excess Qubahan Citations"]] == ["[2]"]
+
+    report = check_references(TEXT)
+    assert [r[:3] for r in report["Qubahan Citations"]] == ["[3]", "[4]"]
+    assert "Excess Qubahan Citations" not in report
@@ -0,0 +1,64 @@
+from format_checker import check_headings, check_tables_figures
+from ref_checker import check_references
+from section_index import SectionIndex
+
+REFERENCES = (
+    "[1] Smith, J. (2020). Improved learning methods for\n"
+    "Improved learning methods\n"
+    "[2] Brown, A. (2019). A study of wrapped reference lines in PDFs.\n"
+    "[3] Green, B. (2018). Another reference that is long enough to count.\n"
+)
+
+def keys(text):
+    return [heading.keys for heading in SectionIndex(text).headings]
+
+def test_standalone_inline_and_numbered_headings():
+    text = "Abstract: We study things.\n1. Introduction\nBody.\nII. Results and Discussion\nMore.\n"
+    assert keys(text) == [("ABSTRACT",), ("INTRODUCTION",), ("RESULT", "DISCUSSION")]
+
+def test_wrapped_body_lines_are_not_headings():
+    text = "Introduction\nWe compare\nthe results of the proposed method\nwith a conclusion\n"
+    assert keys(text) == [("INTRODUCTION",)]
+    assert check_headings(text)[2:] == [
+        "Missing heading: METHOD", "Missing heading: RESULT", "Missing heading: DISCUSSION",
+        "Missing heading: CONCLUSION", "Missing heading: REFERENCES",
+    ]
+
+def test_wrapped_reference_lines_do_not_end_the_reference_list():
+    text = "Introduction\nSee [1], [2] and [3].\nReferences\n" + REFERENCES + "Appendix\nExtra.\n"
+    index = SectionIndex(text)
+    start, end = index.references_span()
+    assert text[start:end] == "\n" + REFERENCES
+    assert keys(text)[-1] == ("APPENDIX",)
+
+def test_body_line_mentioning_references_does_not_start_the_list():
+    text = (
+        "Introduction\nas listed in the\nreferences listed at the end of this paper\n"
+        "Methods\nWe did things [2] and [1], [3].\nReferences\n" + REFERENCES
+    )
+    report = check_references(text)
+    assert report["Total References"] == 3
+    assert report["Missing In-Text Citations"] == []
+
+def test_appendix_line_mentioning_references_keeps_the_reference_list():
+    text = (
+        "Introduction\nSee [1], [2] and [3].\nReferences\n" + REFERENCES
+        + "Appendix\nTable A lists the references cited in\nthe review.\n"
+    )
+    assert check_references(text)["Total References"] == 3
+
+def test_table_ranges_are_intervals_up_to_the_captions():
+    text = "As Tables 1-3 show, and Figure 2.\nTable 1. A\nTable 2. B\nTable 3. C\nFigure 1. D\nFigure 2. E\n"
+    index = SectionIndex(text)
+    assert index.mentions["table"] == [(1, 3, 3)]
+    assert index.mentioned_numbers("table") == [1, 2, 3]
+    assert check_tables_figures(text) == ["FIGURE 1 not referenced in text."]
+
+def test_and_followed_by_a_year_is_not_a_range():
+    text = "Table 1 and 2020 figures are compared.\nTable 1. Results\n"
+    assert SectionIndex(text).mentions["table"] == [(1, 1, 0)]
+    assert check_tables_figures(text) == []
+
+def test_missing_caption_inside_a_plausible_range_is_reported():
+    text = "See Tables 1 and 2.\nTable 1. Results\n"
+    assert check_tables_figures(text) == ["Table 2 referenced but has no caption."]
@@ -0,0 +1,37 @@
+import io
+import os
+
+import pytest
+
+from upload_store import SPILL_PREFIX, UploadStore, UploadTooLarge
+
+def test_small_uploads_stay_in_memory(tmp_path):
+    store = UploadStore(max_bytes=100, spill_bytes=10, memory_bytes=50, spill_dir=str(tmp_path))
+    upload = store.store("a.docx", io.BytesIO(b"12345"))
+    assert (upload.size, upload.source, upload.path) == (5, b"12345", None)
+    assert os.listdir(tmp_path) == []
+
+def test_large_uploads_and_uploads_over_the_memory_budget_spill(tmp_path):
+    store = UploadStore(max_bytes=100, spill_bytes=10, memory_bytes=50, spill_dir=str(tmp_path))
+    large = store.store("a.pdf", b"x" * 20)
+    over_budget = store.store("b.pdf", b"x" * 5, in_memory=48)
+    for upload in (large, over_budget):
+        assert upload.source == upload.path
+        assert os.path.basename(upload.path).startswith(SPILL_PREFIX) and upload.path.endswith(".pdf")
+    with open(large.path, "rb") as f:
+        assert f.read() == b"x" * 20
+    store.discard(large.path)
+    store.discard(large.path)
+    assert not os.path.exists(large.path)
+
+def test_uploads_over_the_limit_are_rejected(tmp_path):
+    store = UploadStore(max_bytes=4, spill_dir=str(tmp_path))
+    with pytest.raises(UploadTooLarge):
+        store.store("a.pdf", b"12345")
+
+def test_stale_spill_files_are_removed(tmp_path):
+    stale = tmp_path / (SPILL_PREFIX + "old.pdf")
+    stale.write_bytes(b"x")
+    os.utime(stale, (0, 0))
+    UploadStore(spill_dir=str(tmp_path))
+    assert not stale.exists()
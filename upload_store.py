@@ -0,0 +1,113 @@
+"""
+Uploaded manuscripts on their way to the analysis workers: kept in memory
+(and passed with the job) when small, spilled to a temporary file when
+large (readers memory-map it), with size limits and cleanup of files left
+behind.
+
+    QAJ_MAX_UPLOAD_MB     largest accepted upload (default 250)
+    QAJ_SPILL_MB          uploads above this go to disk (default 16)
+    QAJ_UPLOAD_MEMORY_MB  total size of in-memory uploads of queued and
+                          running jobs; further uploads spill to disk
+                          (default 128)
+    QAJ_SPILL_DIR         where spilled uploads are written (default: TMPDIR)
+"""
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+from profiling import stage
+
+MB = 1024 * 1024
+SPILL_PREFIX = "qaj-upload-"
+# Spill files older than this were left behind by a killed process.
+STALE_SECONDS = 24 * 3600
+
+# source is the upload's bytes, or the path of its spill file (also path).
+Upload = namedtuple("Upload", ["name", "size", "source", "path"])
+
+class UploadTooLarge(ValueError):
+    pass
+
+def _env_mb(name, default):
+    return int(float(os.environ.get(name, default)) * MB)
+
+def _size(data):
+    if hasattr(data, "getbuffer"):
+        with data.getbuffer() as view:
+            return view.nbytes
+    if hasattr(data, "seek"):
+        position = data.seek(0, os.SEEK_END)
+        data.seek(0)
+        return position
+    return memoryview(data).nbytes
+
+def _bytes(data):
+    if hasattr(data, "getbuffer"):
+        with data.getbuffer() as view:
+            return bytes(view)
+    if hasattr(data, "read"):
+        data.seek(0)
+        return data.read()
+    return bytes(data)
+
+class UploadStore:
+    def __init__(self, max_bytes=None, spill_bytes=None, memory_bytes=None, spill_dir=None):
+        self.max_bytes = _env_mb("QAJ_MAX_UPLOAD_MB", 250) if max_bytes is None else max_bytes
+        self.spill_bytes = _env_mb("QAJ_SPILL_MB", 16) if spill_bytes is None else spill_bytes
+        self.memory_bytes = _env_mb("QAJ_UPLOAD_MEMORY_MB", 128) if memory_bytes is None else memory_bytes
+        self.spill_dir = spill_dir or os.environ.get("QAJ_SPILL_DIR") or tempfile.gettempdir()
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.remove_stale()
+
+    def remove_stale(self, older_than=STALE_SECONDS):
+        cutoff = time.time() - older_than
+        for entry in os.scandir(self.spill_dir):
+            if entry.name.startswith(SPILL_PREFIX) and entry.stat().st_mtime < cutoff:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+    def _spill(self, name, data):
+        with stage("upload_store.spill"):
+            suffix = os.path.splitext(name)[1]
+            with tempfile.NamedTemporaryFile(
+                prefix=SPILL_PREFIX, suffix=suffix, dir=self.spill_dir, delete=False
+            ) as f:
+                if hasattr(data, "read"):
+                    data.seek(0)
+                    shutil.copyfileobj(data, f, MB)
+                else:
+                    f.write(data)
+                return f.name
+
+    def check_size(self, name, data):
+        """Size of data in bytes; raises UploadTooLarge above max_bytes."""
+        size = _size(data)
+        if size > self.max_bytes:
+            raise UploadTooLarge(
+                f"{name} is {size / MB:.1f} MB; uploads are limited to {self.max_bytes / MB:.0f} MB."
+            )
+        return size
+
+    def store(self, name, data, in_memory=0):
+        """
+        Upload for data (bytes-like or a binary file object): its bytes if
+        it is at most spill_bytes and fits in memory_bytes next to the
+        in_memory bytes other uploads hold, else a spill file the caller
+        removes with discard(). Raises UploadTooLarge above max_bytes.
+        """
+        size = self.check_size(name, data)
+        if size <= self.spill_bytes and in_memory + size <= self.memory_bytes:
+            return Upload(name, size, _bytes(data), None)
+        path = self._spill(name, data)
+        return Upload(name, size, path, path)
+
+    @staticmethod
+    def discard(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass